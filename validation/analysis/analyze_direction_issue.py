@@ -15,6 +15,41 @@ def vector_to_bearing(fx, fy):
     bearing = math.degrees(math.atan2(fx, fy))
     return (bearing + 360) % 360
 
+def print_force_analysis(samples):
+    """Print force and movement bearings for every 5th of the first 100 samples."""
+    print("--- FORCE VECTOR ANALYSIS ---")
+    print("Sample | Time   | Boat Hdg | Wind Dir | Wind Force | Total Force | Movement Dir")
+    print("-" * 95)
+
+    for i in range(0, min(100, len(samples)), 5):  # Every 5th sample, first 100
+        sample = samples[i]
+        sim_state = sample['simulation_state']
+        boat = sim_state['boat']
+        forces = sim_state['forces']
+
+        time = sample['elapsed_sec']
+        heading = boat.get('heading', 0)
+
+        wind = forces.get('wind', {})
+        wind_dir = wind.get('pushDirection', 0)  # radians
+        wind_mag = wind.get('magnitude', 0)
+        wind_bearing = vector_to_bearing(wind.get('forceX', 0), wind.get('forceY', 0))
+
+        total = forces.get('total', {})
+        total_bearing = vector_to_bearing(total.get('forceX', 0), total.get('forceY', 0))
+
+        # Get actual position-based movement from the preceding sample
+        if i > 0:
+            pos = sample['position']
+            prev_pos = samples[i-1]['position']
+            movement_bearing = vector_to_bearing(pos['longitude'] - prev_pos['longitude'],
+                                                 pos['latitude'] - prev_pos['latitude'])
+        else:
+            movement_bearing = 0
+
+        print(f"{i:6d} | {time:6.1f}s | {heading:7.1f}° | {math.degrees(wind_dir):7.1f}° | "
+              f"{wind_bearing:7.1f}° ({wind_mag:5.1f}N) | {total_bearing:7.1f}° | {movement_bearing:7.1f}°")
+
 # Test file - using 5m depth as it passed
 test_file = Path("/home/doug/src/signalk-anchorAlarmConnector/validation/data/overnight_tests_20251206_110625/raw_data/test_autoDrop_1kn_5m_20251206_112056.json")
 
@@ -22,8 +57,7 @@ print("=" * 80)
 print("FORCE DIRECTION ANALYSIS - Test 3 (5m depth - PASSED)")
 print("=" * 80)
 
-with open(test_file) as f:
-    data = json.load(f)
+data = json.loads(test_file.read_bytes())
 
 samples = data['samples']
 
@@ -33,42 +67,7 @@ print(f"Expected movement: ~0° North (boat drifts away from wind)")
 print()
 
 # Analyze force vectors over time
-print("--- FORCE VECTOR ANALYSIS ---")
-print("Sample | Time   | Boat Hdg | Wind Dir | Wind Force | Total Force | Movement Dir")
-print("-" * 95)
-
-for i in range(0, min(100, len(samples)), 5):  # Every 5th sample, first 100
-    sample = samples[i]
-    sim_state = sample['simulation_state']
-    boat = sim_state['boat']
-    forces = sim_state['forces']
-
-    time = sample['elapsed_sec']
-    heading = boat.get('heading', 0)
-
-    wind = forces.get('wind', {})
-    wind_dir = wind.get('pushDirection', 0)  # radians
-    wind_fx = wind.get('forceX', 0)
-    wind_fy = wind.get('forceY', 0)
-    wind_mag = wind.get('magnitude', 0)
-    wind_bearing = vector_to_bearing(wind_fx, wind_fy)
-
-    total = forces.get('total', {})
-    total_fx = total.get('forceX', 0)
-    total_fy = total.get('forceY', 0)
-    total_bearing = vector_to_bearing(total_fx, total_fy)
-
-    # Get actual position-based movement
-    if i > 0:
-        prev_sample = samples[i-1]
-        dlat = sample['position']['latitude'] - prev_sample['position']['latitude']
-        dlon = sample['position']['longitude'] - prev_sample['position']['longitude']
-        movement_bearing = vector_to_bearing(dlon, dlat)
-    else:
-        movement_bearing = 0
-
-    print(f"{i:6d} | {time:6.1f}s | {heading:7.1f}° | {math.degrees(wind_dir):7.1f}° | "
-          f"{wind_bearing:7.1f}° ({wind_mag:5.1f}N) | {total_bearing:7.1f}° | {movement_bearing:7.1f}°")
+print_force_analysis(samples)
 
 print()
 
@@ -79,8 +78,7 @@ print("=" * 80)
 
 test_file_3m = Path("/home/doug/src/signalk-anchorAlarmConnector/validation/data/overnight_tests_20251206_110625/raw_data/test_autoDrop_1kn_3m_20251206_111434.json")
 
-with open(test_file_3m) as f:
-    data_3m = json.load(f)
+data_3m = json.loads(test_file_3m.read_bytes())
 
 samples_3m = data_3m['samples']
 
@@ -90,42 +88,7 @@ print(f"Actual movement: 329.3° (should be ~0° North)")
 print()
 
 # Check if there's something different in the forces
-print("--- FORCE VECTOR ANALYSIS ---")
-print("Sample | Time   | Boat Hdg | Wind Dir | Wind Force | Total Force | Movement Dir")
-print("-" * 95)
-
-for i in range(0, min(100, len(samples_3m)), 5):  # Every 5th sample, first 100
-    sample = samples_3m[i]
-    sim_state = sample['simulation_state']
-    boat = sim_state['boat']
-    forces = sim_state['forces']
-
-    time = sample['elapsed_sec']
-    heading = boat.get('heading', 0)
-
-    wind = forces.get('wind', {})
-    wind_dir = wind.get('pushDirection', 0)  # radians
-    wind_fx = wind.get('forceX', 0)
-    wind_fy = wind.get('forceY', 0)
-    wind_mag = wind.get('magnitude', 0)
-    wind_bearing = vector_to_bearing(wind_fx, wind_fy)
-
-    total = forces.get('total', {})
-    total_fx = total.get('forceX', 0)
-    total_fy = total.get('forceY', 0)
-    total_bearing = vector_to_bearing(total_fx, total_fy)
-
-    # Get actual position-based movement
-    if i > 0:
-        prev_sample = samples_3m[i-1]
-        dlat = sample['position']['latitude'] - prev_sample['position']['latitude']
-        dlon = sample['position']['longitude'] - prev_sample['position']['longitude']
-        movement_bearing = vector_to_bearing(dlon, dlat)
-    else:
-        movement_bearing = 0
-
-    print(f"{i:6d} | {time:6.1f}s | {heading:7.1f}° | {math.degrees(wind_dir):7.1f}° | "
-          f"{wind_bearing:7.1f}° ({wind_mag:5.1f}N) | {total_bearing:7.1f}° | {movement_bearing:7.1f}°")
+print_force_analysis(samples_3m)
 
 print()
 
@@ -10,21 +10,54 @@ import json
 import csv
 import math
 import logging
+import functools
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from statistics import mean, stdev
+from statistics import fmean
 
 logger = logging.getLogger(__name__)
 
 
+def cached_metric(method):
+    """Cache a PhysicsAnalyzer metric in self.metrics after its first computation"""
+    @functools.wraps(method)
+    def wrapper(self):
+        key = method.__name__
+        if key not in self.metrics:
+            self.metrics[key] = method(self)
+        return self.metrics[key]
+    return wrapper
+
+
+def sample_stdev(values: List[float], avg: float) -> float:
+    """Sample standard deviation of values around their already-computed mean"""
+    return math.sqrt(math.fsum((v - avg) ** 2 for v in values) / (len(values) - 1))
+
+
 class PhysicsAnalyzer:
     """Analyzes test data to validate physics behavior"""
 
-    def __init__(self, data: List[Dict]):
-        """Initialize with test data"""
+    def __init__(self, data: List[Dict], depth: float = 5, bow_height: float = 2):
+        """Initialize with test data and the depth/bow height it was run at"""
         self.data = data
         self.metrics = {}
-
+        self.depth = depth
+        self.bow_height = bow_height
+        self._vertical_rode = depth + bow_height
+        self._vertical_rode_sq = self._vertical_rode ** 2
+
+        # Extract each field into its own column once so the metrics below
+        # walk flat lists instead of re-reading every point dict
+        self._timestamp = [point.get('timestamp', 0) for point in data]
+        self._distance = [point.get('distance', 0) for point in data]
+        self._rode = [point.get('rodeDeployed', 0) for point in data]
+        self._heading = [point.get('heading', 0) for point in data]
+        self._slack = [point.get('chainSlack', 0) for point in data]
+        self._speed = [math.hypot(point.get('velocityX', 0), point.get('velocityY', 0))
+                       for point in data]
+
+    @cached_metric
     def calculate_drift_rate(self) -> Optional[float]:
         """
         Calculate average drift rate (distance change per second)
@@ -34,8 +67,8 @@ class PhysicsAnalyzer:
         if len(self.data) < 2:
             return None
 
-        distances = [point.get('distance', 0) for point in self.data]
-        timestamps = [point.get('timestamp', 0) for point in self.data]
+        distances = self._distance
+        timestamps = self._timestamp
 
         if timestamps[-1] == timestamps[0]:
             return None
@@ -48,32 +81,26 @@ class PhysicsAnalyzer:
 
         return total_distance / total_time
 
+    @cached_metric
     def calculate_heading_changes(self) -> Dict:
         """
         Analyze heading transitions
 
         Returns metrics on heading behavior at different rode lengths
         """
-        heading_by_rode = {}
+        heading_by_rode = defaultdict(list)
 
-        for point in self.data:
-            rode = point.get('rodeDeployed', 0)
-            heading = point.get('heading', 0)
-
-            # Bucket rode length in 5m increments
-            rode_bucket = round(rode / 5) * 5
-
-            if rode_bucket not in heading_by_rode:
-                heading_by_rode[rode_bucket] = []
-
-            heading_by_rode[rode_bucket].append(heading)
+        # Bucket rode length in 5m increments, keyed by integer bucket index
+        for rode, heading in zip(self._rode, self._heading):
+            heading_by_rode[round(rode / 5)].append(heading)
 
         # Calculate average heading for each bucket
         summary = {}
-        for rode_bucket in sorted(heading_by_rode.keys()):
-            headings = heading_by_rode[rode_bucket]
-            avg_heading = mean(headings)
-            heading_std = stdev(headings) if len(headings) > 1 else 0
+        for bucket_index in sorted(heading_by_rode):
+            headings = heading_by_rode[bucket_index]
+            rode_bucket = bucket_index * 5
+            avg_heading = fmean(headings)
+            heading_std = sample_stdev(headings, avg_heading) if len(headings) > 1 else 0
 
             summary[rode_bucket] = {
                 'average': avg_heading,
@@ -83,11 +110,12 @@ class PhysicsAnalyzer:
 
         return summary
 
+    @cached_metric
     def calculate_max_distance(self) -> float:
         """Calculate maximum distance from anchor reached during test"""
-        distances = [point.get('distance', 0) for point in self.data]
-        return max(distances) if distances else 0
+        return max(self._distance) if self._distance else 0
 
+    @cached_metric
     def calculate_catenary_limit(self) -> Optional[float]:
         """
         Calculate theoretical maximum distance (catenary limit)
@@ -99,49 +127,39 @@ class PhysicsAnalyzer:
             return None
 
         # Get rode at end of test
-        final_rode = self.data[-1].get('rodeDeployed', 0)
-
-        # Estimate depth and bow height from data
-        # (these would normally be provided separately)
-        depth = 5  # Default test depth
-        bow_height = 2  # Default bow height
+        final_rode = self._rode[-1]
 
-        vertical_rode = depth + bow_height
-        if final_rode <= vertical_rode:
+        if final_rode <= self._vertical_rode:
             return 0
 
-        return math.sqrt(final_rode ** 2 - vertical_rode ** 2)
+        return math.sqrt(final_rode ** 2 - self._vertical_rode_sq)
 
+    @cached_metric
     def check_catenary_violation(self) -> List[int]:
         """
         Identify any points where boat exceeded catenary limit
 
         Returns list of indices where violation occurred
         """
-        violations = []
-
-        for i, point in enumerate(self.data):
-            rode = point.get('rodeDeployed', 0)
-            distance = point.get('distance', 0)
-
-            depth = 5
-            bow_height = 2
-            vertical_rode = depth + bow_height
-
-            if rode > vertical_rode:
-                catenary_limit = math.sqrt(rode ** 2 - vertical_rode ** 2)
-                if distance > catenary_limit * 1.01:  # Allow 1% tolerance
-                    violations.append(i)
-
-        return violations
-
+        vertical_rode = self._vertical_rode
+        vertical_rode_sq = self._vertical_rode_sq
+
+        # Compare squared distances against the squared limit (1.01² = 1.0201,
+        # a 1% tolerance) so no sqrt is needed per point
+        return [
+            i for i, (rode, distance) in enumerate(zip(self._rode, self._distance))
+            if rode > vertical_rode
+            and distance * distance > 1.0201 * (rode * rode - vertical_rode_sq)
+        ]
+
+    @cached_metric
     def calculate_slack_changes(self) -> Dict:
         """
         Analyze chain slack behavior
 
         Returns statistics on slack progression
         """
-        slacks = [point.get('chainSlack', 0) for point in self.data]
+        slacks = self._slack
 
         if not slacks:
             return {}
@@ -149,33 +167,30 @@ class PhysicsAnalyzer:
         return {
             'min_slack': min(slacks),
             'max_slack': max(slacks),
-            'avg_slack': mean(slacks),
+            'avg_slack': fmean(slacks),
             'slack_range': max(slacks) - min(slacks),
             'went_negative': any(s < 0 for s in slacks),
             'negative_count': sum(1 for s in slacks if s < 0)
         }
 
+    @cached_metric
     def calculate_velocity(self) -> Dict:
         """
         Calculate boat velocity statistics
 
         Returns speed and direction metrics
         """
-        velocities = []
-
-        for point in self.data:
-            vx = point.get('velocityX', 0)
-            vy = point.get('velocityY', 0)
-            speed = math.sqrt(vx ** 2 + vy ** 2)
-            velocities.append(speed)
+        velocities = self._speed
 
         if not velocities:
             return {}
 
+        avg_velocity = fmean(velocities)
+
         return {
             'max_velocity': max(velocities),
-            'avg_velocity': mean(velocities),
-            'velocity_stdev': stdev(velocities) if len(velocities) > 1 else 0,
+            'avg_velocity': avg_velocity,
+            'velocity_stdev': sample_stdev(velocities, avg_velocity) if len(velocities) > 1 else 0,
             'max_acceleration': self._calculate_max_acceleration()
         }
 
@@ -184,22 +199,12 @@ class PhysicsAnalyzer:
         if len(self.data) < 2:
             return 0
 
-        max_accel = 0
         dt = 0.5  # Simulation time step in seconds
 
-        for i in range(1, len(self.data)):
-            vx_prev = self.data[i-1].get('velocityX', 0)
-            vy_prev = self.data[i-1].get('velocityY', 0)
-            v_prev = math.sqrt(vx_prev ** 2 + vy_prev ** 2)
-
-            vx_curr = self.data[i].get('velocityX', 0)
-            vy_curr = self.data[i].get('velocityY', 0)
-            v_curr = math.sqrt(vx_curr ** 2 + vy_curr ** 2)
-
-            accel = abs(v_curr - v_prev) / dt
-            max_accel = max(max_accel, accel)
+        speeds = self._speed
+        max_delta = max(abs(v_curr - v_prev) for v_prev, v_curr in zip(speeds, speeds[1:]))
 
-        return max_accel
+        return max_delta / dt
 
     def generate_report(self) -> str:
         """Generate a comprehensive analysis report"""
@@ -268,8 +273,7 @@ class PhysicsAnalyzer:
         report.append("HEADING ANALYSIS")
         report.append("-" * 70)
         heading_summary = self.calculate_heading_changes()
-        for rode_bucket in sorted(heading_summary.keys()):
-            stats = heading_summary[rode_bucket]
+        for rode_bucket, stats in heading_summary.items():  # already in rode order
             report.append(f"Rode ~{rode_bucket}m: heading={stats['average']:.1f}° "
                         f"(±{stats['stdev']:.1f}°, n={stats['samples']})")
         report.append("")
@@ -298,9 +302,10 @@ class PhysicsAnalyzer:
             fieldnames = list(self.data[0].keys())
 
             with open(filename, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(self.data)
+                writer = csv.writer(f)
+                writer.writerow(fieldnames)
+                # Missing fields are written as empty cells, as DictWriter did
+                writer.writerows([point.get(k) for k in fieldnames] for point in self.data)
 
             logger.info(f"Data exported to {filename}")
         except IOError as e:
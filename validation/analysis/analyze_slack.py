@@ -4,141 +4,169 @@ Analyze chain slack values from overnight test results.
 Focuses on slack-based motor control validation.
 """
 
+import io
 import json
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
-from statistics import mean, stdev
+from statistics import fmean
+
+from analyze_results import sample_stdev
 
 # Test session directory
 session_dir = Path("/home/doug/src/signalk-anchorAlarmConnector/validation/data/overnight_tests_20251206_110625")
 raw_data_dir = session_dir / "raw_data"
 
-# Find all autoDrop test files
-autodrop_files = sorted(raw_data_dir.glob("test_autoDrop_*.json"))
+# Slack ranges, in order: label for the distribution table, label for the correlation samples
+SLACK_RANGES = [
+    ('< 0m (NEGATIVE)', '< 0m (NEGATIVE)'),
+    ('0-1m (HIGH motor)', '0-1m (HIGH)'),
+    ('1-3m (MED motor)', '1-3m (MED)'),
+    ('> 3m (LOW/OFF motor)', '> 3m (LOW/OFF)'),
+]
+
+def slack_range(slack):
+    """Index into SLACK_RANGES for a slack value."""
+    if slack < 0:
+        return 0
+    if slack < 1:
+        return 1
+    if slack < 3:
+        return 2
+    return 3
+
+def analyze_file(test_file):
+    """Analyze one test file and return its report as a string."""
+    out = io.StringIO()
+    with redirect_stdout(out):
+        print(f"\n{'=' * 80}")
+        print(f"File: {test_file.name}")
+        print("=" * 80)
+
+        data = json.loads(test_file.read_bytes())
+
+        metadata = data['test_metadata']
+        samples = data['samples']
+
+        print(f"\nTest: {metadata['test_type']} at {metadata['wind_speed_kn']}kn wind, {metadata['depth_m']}m depth")
+        print(f"Duration: {metadata['duration_sec']:.1f}s ({metadata['sample_count']} samples)")
+        print(f"Result: {'TIMEOUT' if metadata.get('timeout') else 'COMPLETED'}")
+
+        # Extract slack data from samples, bucketing slack and motor state in the same pass
+        slack_values = []
+        motor_forces = []
+        slack_ranges = []
+        range_counts = [0] * len(SLACK_RANGES)
+        motor_on_samples = []
+        final_rode = final_dist = None
+
+        for sample in samples:
+            sim_state = sample.get('simulation_state', {})
+            forces = sim_state.get('forces', {})
+
+            slack = forces.get('constraint', {}).get('slack')
+            if slack is None:
+                continue
+
+            motor_mag = forces.get('motor', {}).get('magnitude', 0)
+            bucket = slack_range(slack)
 
-print("=" * 80)
-print("CHAIN SLACK ANALYSIS - Overnight Tests 20251206_110625")
-print("=" * 80)
-print()
+            slack_values.append(slack)
+            motor_forces.append(motor_mag)
+            slack_ranges.append(bucket)
+            range_counts[bucket] += 1
+            if motor_mag > 0:
+                motor_on_samples.append(motor_mag)
+            final_rode = sample.get('rodeDeployed', 0)
+            final_dist = sample.get('distance_from_start', 0)
+
+        if not slack_values:
+            print("\n⚠️  NO SLACK DATA FOUND in samples")
+            return out.getvalue()
+
+        min_slack = min(slack_values)
+        avg_slack = fmean(slack_values)
+
+        print(f"\n--- CHAIN SLACK STATISTICS ---")
+        print(f"Total samples with slack data: {len(slack_values)}")
+        print(f"  Min slack:  {min_slack:7.3f}m")
+        print(f"  Max slack:  {max(slack_values):7.3f}m")
+        print(f"  Avg slack:  {avg_slack:7.3f}m")
+        if len(slack_values) > 1:
+            print(f"  Std dev:    {sample_stdev(slack_values, avg_slack):7.3f}m")
+
+        # Count negative slack samples
+        negative_count = range_counts[0]
+        print(f"\nNegative slack samples: {negative_count} ({100*negative_count/len(slack_values):.1f}%)")
+        if negative_count:
+            print(f"  Most negative: {min_slack:.3f}m")
+
+        # Analyze slack distribution
+        print(f"\n--- SLACK DISTRIBUTION ---")
+        for (range_name, _), count in zip(SLACK_RANGES, range_counts):
+            pct = 100 * count / len(slack_values)
+            print(f"  {range_name}: {count:4d} samples ({pct:5.1f}%)")
+
+        # Analyze motor performance
+        print(f"\n--- MOTOR PERFORMANCE ---")
+        if motor_on_samples:
+            print(f"Motor ON samples: {len(motor_on_samples)} ({100*len(motor_on_samples)/len(motor_forces):.1f}%)")
+            print(f"  Min force:  {min(motor_on_samples):7.1f}N")
+            print(f"  Max force:  {max(motor_on_samples):7.1f}N")
+            print(f"  Avg force:  {fmean(motor_on_samples):7.1f}N")
+        else:
+            print(f"Motor ON samples: 0 (0.0%)")
 
-for test_file in autodrop_files:
-    print(f"\n{'=' * 80}")
-    print(f"File: {test_file.name}")
-    print("=" * 80)
+        motor_off_count = len(motor_forces) - len(motor_on_samples)
+        print(f"Motor OFF samples: {motor_off_count} ({100*motor_off_count/len(motor_forces):.1f}%)")
 
-    with open(test_file) as f:
-        data = json.load(f)
+        # Correlate motor state with slack ranges
+        print(f"\n--- MOTOR STATE vs SLACK CORRELATION ---")
+        # Sample every 50th point to avoid overwhelming output
+        for i in range(0, len(slack_values), 50):
+            slack = slack_values[i]
+            motor_force = motor_forces[i]
+            range_name = SLACK_RANGES[slack_ranges[i]][1]
+            motor_state = 'ON' if motor_force > 0 else 'OFF'
+            print(f"  Sample {i:4d}: slack={slack:6.2f}m [{range_name:20s}] motor={motor_state:3s} ({motor_force:6.1f}N)")
 
-    metadata = data['test_metadata']
-    samples = data['samples']
+        # Final deployment metrics
+        print(f"\n--- DEPLOYMENT METRICS ---")
+        print(f"  Final rode deployed: {final_rode:.2f}m")
+        print(f"  Final distance from start: {final_dist:.2f}m")
+        print(f"  Target rode for 5:1 scope: {5 * (metadata['depth_m'] + 2):.2f}m")  # depth + 2m bow height
 
-    print(f"\nTest: {metadata['test_type']} at {metadata['wind_speed_kn']}kn wind, {metadata['depth_m']}m depth")
-    print(f"Duration: {metadata['duration_sec']:.1f}s ({metadata['sample_count']} samples)")
-    print(f"Result: {'TIMEOUT' if metadata.get('timeout') else 'COMPLETED'}")
+        # Check if test failed
+        target_scope = metadata.get('target_scope', 5.0)
+        final_scope = final_rode / (metadata['depth_m'] + 2) if (metadata['depth_m'] + 2) > 0 else 0
+        print(f"  Final scope: {final_scope:.2f}:1 (target: {target_scope:.1f}:1)")
 
-    # Extract slack data from samples
-    slack_values = []
-    motor_forces = []
-    rode_deployed = []
-    distances = []
-    motor_states = []  # Track motor on/off
+        if final_scope < target_scope:
+            print(f"\n❌ TEST FAILED: Scope {final_scope:.2f}:1 < target {target_scope:.1f}:1")
+        else:
+            print(f"\n✅ TEST PASSED: Scope {final_scope:.2f}:1 >= target {target_scope:.1f}:1")
 
-    for sample in samples:
-        sim_state = sample.get('simulation_state', {})
-        forces = sim_state.get('forces', {})
-        constraint = forces.get('constraint', {})
-        motor = forces.get('motor', {})
+    return out.getvalue()
 
-        slack = constraint.get('slack')
-        motor_mag = motor.get('magnitude', 0)
-        rode = sample.get('rodeDeployed', 0)
-        dist = sample.get('distance_from_start', 0)
+def main():
+    """Analyze every autoDrop test file in the session directory."""
+    # Find all autoDrop test files
+    autodrop_files = sorted(raw_data_dir.glob("test_autoDrop_*.json"))
 
-        if slack is not None:
-            slack_values.append(slack)
-            motor_forces.append(motor_mag)
-            rode_deployed.append(rode)
-            distances.append(dist)
-            motor_states.append('ON' if motor_mag > 0 else 'OFF')
-
-    if not slack_values:
-        print("\n⚠️  NO SLACK DATA FOUND in samples")
-        continue
-
-    print(f"\n--- CHAIN SLACK STATISTICS ---")
-    print(f"Total samples with slack data: {len(slack_values)}")
-    print(f"  Min slack:  {min(slack_values):7.3f}m")
-    print(f"  Max slack:  {max(slack_values):7.3f}m")
-    print(f"  Avg slack:  {mean(slack_values):7.3f}m")
-    if len(slack_values) > 1:
-        print(f"  Std dev:    {stdev(slack_values):7.3f}m")
-
-    # Count negative slack samples
-    negative_slack = [s for s in slack_values if s < 0]
-    print(f"\nNegative slack samples: {len(negative_slack)} ({100*len(negative_slack)/len(slack_values):.1f}%)")
-    if negative_slack:
-        print(f"  Most negative: {min(negative_slack):.3f}m")
-
-    # Analyze slack distribution
-    slack_ranges = {
-        '< 0m (NEGATIVE)': [s for s in slack_values if s < 0],
-        '0-1m (HIGH motor)': [s for s in slack_values if 0 <= s < 1],
-        '1-3m (MED motor)': [s for s in slack_values if 1 <= s < 3],
-        '> 3m (LOW/OFF motor)': [s for s in slack_values if s >= 3]
-    }
-
-    print(f"\n--- SLACK DISTRIBUTION ---")
-    for range_name, range_values in slack_ranges.items():
-        count = len(range_values)
-        pct = 100 * count / len(slack_values) if slack_values else 0
-        print(f"  {range_name}: {count:4d} samples ({pct:5.1f}%)")
-
-    # Analyze motor performance
-    print(f"\n--- MOTOR PERFORMANCE ---")
-    motor_on_samples = [m for m in motor_forces if m > 0]
-    if motor_on_samples:
-        print(f"Motor ON samples: {len(motor_on_samples)} ({100*len(motor_on_samples)/len(motor_forces):.1f}%)")
-        print(f"  Min force:  {min(motor_on_samples):7.1f}N")
-        print(f"  Max force:  {max(motor_on_samples):7.1f}N")
-        print(f"  Avg force:  {mean(motor_on_samples):7.1f}N")
-    else:
-        print(f"Motor ON samples: 0 (0.0%)")
-
-    motor_off_samples = [m for m in motor_forces if m == 0]
-    print(f"Motor OFF samples: {len(motor_off_samples)} ({100*len(motor_off_samples)/len(motor_forces):.1f}%)")
-
-    # Correlate motor state with slack ranges
-    print(f"\n--- MOTOR STATE vs SLACK CORRELATION ---")
-    for i, (slack, motor_force) in enumerate(zip(slack_values, motor_forces)):
-        if slack < 0:
-            range_name = '< 0m (NEGATIVE)'
-        elif slack < 1:
-            range_name = '0-1m (HIGH)'
-        elif slack < 3:
-            range_name = '1-3m (MED)'
-        else:
-            range_name = '> 3m (LOW/OFF)'
+    print("=" * 80)
+    print("CHAIN SLACK ANALYSIS - Overnight Tests 20251206_110625")
+    print("=" * 80)
+    print()
 
-        # Sample every 50th point to avoid overwhelming output
-        if i % 50 == 0:
-            motor_state = 'ON' if motor_force > 0 else 'OFF'
-            print(f"  Sample {i:4d}: slack={slack:6.2f}m [{range_name:20s}] motor={motor_state:3s} ({motor_force:6.1f}N)")
+    # Files are independent, so analyze them on all cores and print each
+    # report whole, in file order
+    with ProcessPoolExecutor() as executor:
+        for report in executor.map(analyze_file, autodrop_files):
+            print(report, end='')
+
+    print("\n" + "=" * 80)
+    print("END OF SLACK ANALYSIS")
+    print("=" * 80)
 
-    # Final deployment metrics
-    print(f"\n--- DEPLOYMENT METRICS ---")
-    print(f"  Final rode deployed: {rode_deployed[-1]:.2f}m")
-    print(f"  Final distance from start: {distances[-1]:.2f}m")
-    print(f"  Target rode for 5:1 scope: {5 * (metadata['depth_m'] + 2):.2f}m")  # depth + 2m bow height
-
-    # Check if test failed
-    target_scope = metadata.get('target_scope', 5.0)
-    final_scope = rode_deployed[-1] / (metadata['depth_m'] + 2) if (metadata['depth_m'] + 2) > 0 else 0
-    print(f"  Final scope: {final_scope:.2f}:1 (target: {target_scope:.1f}:1)")
-
-    if final_scope < target_scope:
-        print(f"\n❌ TEST FAILED: Scope {final_scope:.2f}:1 < target {target_scope:.1f}:1")
-    else:
-        print(f"\n✅ TEST PASSED: Scope {final_scope:.2f}:1 >= target {target_scope:.1f}:1")
-
-print("\n" + "=" * 80)
-print("END OF SLACK ANALYSIS")
-print("=" * 80)
+if __name__ == '__main__':
+    main()
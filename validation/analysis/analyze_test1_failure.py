@@ -8,20 +8,48 @@ Focus on:
 """
 
 import json
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 import math
 
 def calculate_bearing(lat1, lon1, lat2, lon2):
-    """Calculate bearing between two points in degrees."""
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
+    """Calculate initial great-circle bearing between two points in degrees.
 
-    if abs(dlat) < 1e-10 and abs(dlon) < 1e-10:
+    Unlike atan2 on raw degree deltas, this accounts for longitude degrees
+    shrinking with latitude (about 0.72x at the test site).
+    """
+    if abs(lat2 - lat1) < 1e-10 and abs(lon2 - lon1) < 1e-10:
         return 0.0
 
-    bearing = math.degrees(math.atan2(dlon, dlat))
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlam = math.radians(lon2 - lon1)
+    cos_phi2 = math.cos(phi2)
+
+    y = math.sin(dlam) * cos_phi2
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * cos_phi2 * math.cos(dlam)
+    bearing = math.degrees(math.atan2(y, x))
     return (bearing + 360) % 360
 
+def interval_sample_indices(samples, interval):
+    """Yield indices of samples in the first second of each interval (int(elapsed) % interval == 0).
+
+    Samples are in elapsed-time order, so each interval's start is found by
+    bisection and the samples in between are never visited.
+    """
+    elapsed = itemgetter('elapsed_sec')
+    i = 0
+    target = 0
+    while i < len(samples):
+        i = bisect_left(samples, target, lo=i, key=elapsed)
+        while i < len(samples) and samples[i]['elapsed_sec'] < target + 1:
+            yield i
+            i += 1
+        target += interval
+
 # Test file
 test_file = Path("/home/doug/src/signalk-anchorAlarmConnector/validation/data/overnight_tests_20251206_110625/raw_data/test_autoDrop_1kn_3m_20251206_111434.json")
 
@@ -29,8 +57,7 @@ print("=" * 80)
 print("DETAILED ANALYSIS: Test 1 (autoDrop 1kn 3m depth) - FAILURE INVESTIGATION")
 print("=" * 80)
 
-with open(test_file) as f:
-    data = json.load(f)
+data = json.loads(test_file.read_bytes())
 
 metadata = data['test_metadata']
 samples = data['samples']
@@ -71,9 +98,9 @@ motor_off_count = 0
 
 # Sample every 20 seconds
 sample_interval = 20  # seconds
-sample_indices = [i for i, s in enumerate(samples) if int(s['elapsed_sec']) % sample_interval == 0]
+sample_indices = interval_sample_indices(samples, sample_interval)
 
-for i in sample_indices[:30]:  # First 30 intervals (10 minutes)
+for i in islice(sample_indices, 30):  # First 30 intervals (10 minutes) - stops scanning there
     sample = samples[i]
     sim_state = sample.get('simulation_state', {})
     forces = sim_state.get('forces', {})
@@ -107,81 +134,86 @@ print()
 print(f"Motor ON samples: {motor_on_count} ({100*motor_on_count/(motor_on_count+motor_off_count):.1f}%)")
 print(f"Motor OFF samples: {motor_off_count} ({100*motor_off_count/(motor_on_count+motor_off_count):.1f}%)")
 
-# Analyze motor engagement vs slack
+# Analyze motor engagement vs slack, bucketing motor-OFF slack in the same pass
 print("\n--- MOTOR ENGAGEMENT vs SLACK ---")
-motor_on_samples = []
-motor_off_samples = []
+# Motor ON events: only the first and last 10 are printed, so keep just those
+# plus running slack stats instead of every event
+motor_on_first = []
+motor_on_last = deque(maxlen=10)
+motor_on_total = 0
+slack_on_min = math.inf
+slack_on_max = -math.inf
+slack_on_sum = 0.0
+motor_off_total = 0
+
+slack_ranges_off = {
+    '< 0m (should be HIGH motor)': 0,
+    '0-1m (should be HIGH motor)': 0,
+    '1-3m (should be MED motor)': 0,
+    '> 3m (should be LOW/OFF)': 0
+}
 
 for sample in samples:
-    sim_state = sample.get('simulation_state', {})
-    forces = sim_state.get('forces', {})
-    constraint = forces.get('constraint', {})
-    motor = forces.get('motor', {})
+    forces = sample.get('simulation_state', {}).get('forces', {})
 
-    slack = constraint.get('slack')
-    motor_force = motor.get('magnitude', 0)
+    slack = forces.get('constraint', {}).get('slack')
+    if slack is None:
+        continue
 
-    if slack is not None:
-        if motor_force > 0:
-            motor_on_samples.append({
-                'slack': slack,
-                'force': motor_force,
-                'time': sample['elapsed_sec']
-            })
+    motor_force = forces.get('motor', {}).get('magnitude', 0)
+    if motor_force > 0:
+        event = {
+            'slack': slack,
+            'force': motor_force,
+            'time': sample['elapsed_sec']
+        }
+        if len(motor_on_first) < 10:
+            motor_on_first.append(event)
+        motor_on_last.append(event)
+        motor_on_total += 1
+        slack_on_min = min(slack_on_min, slack)
+        slack_on_max = max(slack_on_max, slack)
+        slack_on_sum += slack
+    else:
+        motor_off_total += 1
+        if slack < 0:
+            slack_ranges_off['< 0m (should be HIGH motor)'] += 1
+        elif slack < 1:
+            slack_ranges_off['0-1m (should be HIGH motor)'] += 1
+        elif slack < 3:
+            slack_ranges_off['1-3m (should be MED motor)'] += 1
         else:
-            motor_off_samples.append({
-                'slack': slack,
-                'time': sample['elapsed_sec']
-            })
+            slack_ranges_off['> 3m (should be LOW/OFF)'] += 1
 
-print(f"\nTotal motor ON events: {len(motor_on_samples)}")
-if motor_on_samples:
+print(f"\nTotal motor ON events: {motor_on_total}")
+if motor_on_total:
     print("\nFirst 10 motor ON events:")
-    for i, event in enumerate(motor_on_samples[:10]):
+    for event in motor_on_first:
         print(f"  t={event['time']:7.1f}s: slack={event['slack']:6.2f}m, force={event['force']:6.1f}N")
 
     print("\nLast 10 motor ON events:")
-    for event in motor_on_samples[-10:]:
+    for event in motor_on_last:
         print(f"  t={event['time']:7.1f}s: slack={event['slack']:6.2f}m, force={event['force']:6.1f}N")
 
     # Analyze slack values when motor was ON
-    slack_when_on = [e['slack'] for e in motor_on_samples]
     print(f"\nSlack when motor ON:")
-    print(f"  Min: {min(slack_when_on):6.2f}m")
-    print(f"  Max: {max(slack_when_on):6.2f}m")
-    print(f"  Avg: {sum(slack_when_on)/len(slack_when_on):6.2f}m")
+    print(f"  Min: {slack_on_min:6.2f}m")
+    print(f"  Max: {slack_on_max:6.2f}m")
+    print(f"  Avg: {slack_on_sum/motor_on_total:6.2f}m")
 
 # Analyze why motor didn't engage more
 print("\n--- WHY MOTOR DIDN'T ENGAGE ---")
 
-# Count samples in each slack range with motor OFF
-slack_ranges_off = {
-    '< 0m (should be HIGH motor)': 0,
-    '0-1m (should be HIGH motor)': 0,
-    '1-3m (should be MED motor)': 0,
-    '> 3m (should be LOW/OFF)': 0
-}
-
-for event in motor_off_samples:
-    slack = event['slack']
-    if slack < 0:
-        slack_ranges_off['< 0m (should be HIGH motor)'] += 1
-    elif slack < 1:
-        slack_ranges_off['0-1m (should be HIGH motor)'] += 1
-    elif slack < 3:
-        slack_ranges_off['1-3m (should be MED motor)'] += 1
-    else:
-        slack_ranges_off['> 3m (should be LOW/OFF)'] += 1
-
 print("\nMotor OFF samples by slack range (should motor have been ON?):")
 for range_name, count in slack_ranges_off.items():
-    pct = 100 * count / len(motor_off_samples) if motor_off_samples else 0
+    pct = 100 * count / motor_off_total if motor_off_total else 0
     print(f"  {range_name}: {count:4d} samples ({pct:5.1f}%)")
 
 # Check autoDrop stage transitions
 print("\n--- AUTODROP STAGE TRANSITIONS ---")
 prev_stage = None
-for sample in samples[::10]:  # Every 10th sample
+for i in range(0, len(samples), 10):  # Every 10th sample, without copying the list
+    sample = samples[i]
     stage = sample.get('autoStage', 'Unknown')
     if stage != prev_stage:
         print(f"t={sample['elapsed_sec']:7.1f}s: {prev_stage or 'START'} -> {stage}")
@@ -198,8 +230,8 @@ print(f"   - This is {abs(actual_bearing - 180):.1f}° off from expected directi
 print(f"   - Wind is from {metadata['wind_direction']}°, boat should drift North (away from wind)")
 
 print("\n2. MOTOR ENGAGEMENT ISSUE:")
-print(f"   - Motor only ON for {len(motor_on_samples)} samples ({100*len(motor_on_samples)/len(samples):.1f}%)")
-print(f"   - Motor OFF for {len(motor_off_samples)} samples ({100*len(motor_off_samples)/len(samples):.1f}%)")
+print(f"   - Motor only ON for {motor_on_total} samples ({100*motor_on_total/len(samples):.1f}%)")
+print(f"   - Motor OFF for {motor_off_total} samples ({100*motor_off_total/len(samples):.1f}%)")
 print(f"   - Motor OFF even when slack < 1m: {slack_ranges_off['0-1m (should be HIGH motor)']} samples")
 print(f"   - Motor OFF even with negative slack: {slack_ranges_off['< 0m (should be HIGH motor)']} samples")
 
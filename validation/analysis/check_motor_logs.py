@@ -14,8 +14,7 @@ print("=" * 80)
 print("MOTOR ENGAGEMENT CONDITION ANALYSIS")
 print("=" * 80)
 
-with open(test_file) as f:
-    data = json.load(f)
+data = json.loads(test_file.read_bytes())
 
 samples = data['samples']
 
@@ -42,41 +41,54 @@ print()
 print("Sample | Time | Speed | Slack | Command  | Motor State | Why Motor OFF?")
 print("-" * 90)
 
-for i in range(min(50, len(samples))):
-    sample = samples[i]
+# Walk every sample once: print the first 50 in detail and tally the summary as we go
+deploy_min_speed = motor_config.get('deployMinSpeed', 0.3)
+motor_should_be_on_count = 0
+motor_is_on_count = 0
+motor_correctly_off_count = 0
+
+for i, sample in enumerate(samples):
     sim_state = sample['simulation_state']
     boat = sim_state['boat']
     forces = sim_state['forces']
     motor = forces.get('motor', {})
     constraint = forces.get('constraint', {})
 
-    time = sample['elapsed_sec']
     speed = boat.get('speed', 0)
     slack = constraint.get('slack')
     command = sample.get('anchorCommand', 'unknown')
     motor_mag = motor.get('magnitude', 0)
-    motor_dir = motor.get('direction', 'unknown')
-
-    motor_state = f"{motor_dir} ({motor_mag:.0f}N)"
 
-    # Determine why motor should or shouldn't be ON
-    deploy_min_speed = motor_config.get('deployMinSpeed', 0.3)
-    deploy_target_speed = motor_config.get('deployTargetSpeed', 0.8)
+    if slack is None:
+        continue
 
     # Calculate expected target speed based on slack
-    if slack is not None:
-        if slack < 1.0:
-            expected_target = 0  # Should stop
-            slack_range = "< 1m (STOP)"
-        elif slack < 3.0:
-            expected_target = 0.4  # Medium
-            slack_range = "1-3m (MED)"
+    if slack < 1.0:
+        expected_target = 0  # Should stop
+        slack_range = "< 1m (STOP)"
+    elif slack < 3.0:
+        expected_target = 0.4  # Medium
+        slack_range = "1-3m (MED)"
+    else:
+        expected_target = 0.8  # High
+        slack_range = "> 3m (HIGH)"
+
+    # Should motor be ON?
+    should_motor_on = speed < deploy_min_speed and expected_target > 0
+
+    if command in ['autoDrop', 'down']:
+        if should_motor_on:
+            motor_should_be_on_count += 1
+            if motor_mag > 0:
+                motor_is_on_count += 1
         else:
-            expected_target = 0.8  # High
-            slack_range = "> 3m (HIGH)"
+            if motor_mag == 0:
+                motor_correctly_off_count += 1
 
-        # Should motor be ON?
-        should_motor_on = speed < deploy_min_speed and expected_target > 0
+    if i < 50:
+        time = sample['elapsed_sec']
+        motor_dir = motor.get('direction', 'unknown')
+        motor_state = f"{motor_dir} ({motor_mag:.0f}N)"
 
         why_off = ""
         if motor_mag == 0:
@@ -94,42 +106,6 @@ print()
 print("=" * 90)
 print()
 
-# Summary statistics
-motor_should_be_on_count = 0
-motor_is_on_count = 0
-motor_correctly_off_count = 0
-
-for sample in samples:
-    sim_state = sample['simulation_state']
-    boat = sim_state['boat']
-    forces = sim_state['forces']
-    motor = forces.get('motor', {})
-    constraint = forces.get('constraint', {})
-
-    speed = boat.get('speed', 0)
-    slack = constraint.get('slack')
-    command = sample.get('anchorCommand', 'unknown')
-    motor_mag = motor.get('magnitude', 0)
-
-    if command in ['autoDrop', 'down'] and slack is not None:
-        # Determine expected target speed
-        if slack < 1.0:
-            expected_target = 0
-        elif slack < 3.0:
-            expected_target = 0.4
-        else:
-            expected_target = 0.8
-
-        should_motor_on = speed < motor_config.get('deployMinSpeed', 0.3) and expected_target > 0
-
-        if should_motor_on:
-            motor_should_be_on_count += 1
-            if motor_mag > 0:
-                motor_is_on_count += 1
-        else:
-            if motor_mag == 0:
-                motor_correctly_off_count += 1
-
 print("--- SUMMARY ---")
 print(f"Total samples where motor SHOULD be ON: {motor_should_be_on_count}")
 print(f"Samples where motor IS ON when it should be: {motor_is_on_count}")
@@ -7,6 +7,7 @@ Tracks progress over multiple test runs with detailed breakdown.
 
 import json
 import glob
+import math
 import csv
 from datetime import datetime
 from pathlib import Path
@@ -92,7 +93,6 @@ class TestScorer:
             return 0, "No movement detected"
 
         # Calculate bearing of movement (0=North, 90=East, 180=South, 270=West)
-        import math
         movement_bearing = math.atan2(lon_change, lat_change) * 180 / math.pi
         if movement_bearing < 0:
             movement_bearing += 360
@@ -5,17 +5,25 @@ Connects to SignalK server and analyzes boat behavior
 """
 
 import json
+import math
+import sys
 import time
 import urllib.request
 import urllib.error
 from datetime import datetime
+from pathlib import Path
 
-# Global token for authenticated requests
+# Add validation/utils to path so we can import common
+sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
+from common import http_request
+
+# Global token for authenticated requests, and the PUT headers built from it once
 auth_token = None
+auth_headers = None
 
 def get_auth_token():
     """Get authentication token from SignalK server"""
-    global auth_token
+    global auth_token, auth_headers
     try:
         url = "http://localhost:80/signalk/v1/auth/login"
         credentials = {"username": "admin", "password": "signalk"}
@@ -27,6 +35,8 @@ def get_auth_token():
             result = json.loads(response.read())
             auth_token = result.get('token')
             if auth_token:
+                auth_headers = {'Content-Type': 'application/json',
+                                'Authorization': f'Bearer {auth_token}'}
                 print(f"✓ Authentication successful")
                 return True
             else:
@@ -40,15 +50,14 @@ def get_signalk_data(path=""):
     """Get data from SignalK server"""
     try:
         url = f"http://localhost:80/signalk/v1/api/vessels/self{path}"
-        with urllib.request.urlopen(url, timeout=2) as response:
-            return json.loads(response.read())
+        # Keep-alive connection, reused across the once-a-second polls
+        return json.loads(http_request('GET', url, timeout=2))
     except (urllib.error.URLError, json.JSONDecodeError, Exception) as e:
         print(f"Error getting SignalK data: {e}")
         return None
 
 def send_signalk_command(path, value):
     """Send a command to SignalK server via PUT request"""
-    global auth_token
     if not auth_token:
         print("Error: Not authenticated")
         return False
@@ -56,12 +65,8 @@ def send_signalk_command(path, value):
     try:
         url = f"http://localhost:80/signalk/v1/api/vessels/self/{path}"
         data = json.dumps({"value": value}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
+        http_request('PUT', url, data, auth_headers, timeout=2)
+        return True
     except (urllib.error.URLError, Exception) as e:
         print(f"Error sending SignalK command: {e}")
         return False
@@ -101,20 +106,25 @@ def test_anchor_physics():
 
     # Collect data samples over time
     samples = []
-    print("\nCollecting physics data for 30 seconds...")
+    # Samples record only their offset (time_sec) from this start time,
+    # which is saved once in the sibling .meta.json file
+    started = datetime.now().isoformat()
+    print(f"\nCollecting physics data for 30 seconds from {started}...")
 
+    # Poll on a fixed 1s schedule so request time overlaps the wait instead of adding to it
+    start = time.monotonic()
     for i in range(30):
+        time.sleep(max(0, start + i - time.monotonic()))
+
         data = get_signalk_data()
         if not data:
             print(f"  {i}s: Error getting data")
-            time.sleep(1)
             continue
 
         nav = data.get('navigation', {})
         env = data.get('environment', {})
 
         sample = {
-            'timestamp': datetime.now().isoformat(),
             'time_sec': i,
             'position': nav.get('position', {}).get('value', {}),
             'heading': nav.get('headingTrue', {}).get('value', 0),
@@ -131,7 +141,7 @@ def test_anchor_physics():
         # Print current status
         pos = sample['position']
         anchor_pos = sample['anchor_pos']
-        heading_deg = (sample['heading'] * 180 / 3.14159) % 360
+        heading_deg = math.degrees(sample['heading']) % 360
         wind_speed = sample['wind_speed']
 
         # Handle None or invalid position
@@ -155,8 +165,6 @@ def test_anchor_physics():
             print(f"  {i}s: Error processing position data: {e}")
             continue
 
-        time.sleep(1)
-
     if not samples:
         print("✗ No data collected")
         return False
@@ -189,29 +197,35 @@ def test_anchor_physics():
 
     print(f"\nHeading Metrics:")
     avg_heading = sum(headings) / len(headings) if headings else 0
-    avg_heading_deg = (avg_heading * 180 / 3.14159) % 360
+    avg_heading_deg = math.degrees(avg_heading) % 360
     avg_wind_speed = sum(wind_speeds) / len(wind_speeds) if wind_speeds else 0
     print(f"  Average heading: {avg_heading_deg:.1f}°")
     print(f"  Average wind speed: {avg_wind_speed:.2f} m/s")
 
+    min_rode, max_rode = min(rodes), max(rodes)
     print(f"\nRode Metrics:")
-    print(f"  Min rode: {min(rodes):.1f}m")
-    print(f"  Max rode: {max(rodes):.1f}m")
-    print(f"  Rode range: {max(rodes) - min(rodes):.1f}m")
+    print(f"  Min rode: {min_rode:.1f}m")
+    print(f"  Max rode: {max_rode:.1f}m")
+    print(f"  Rode range: {max_rode - min_rode:.1f}m")
 
+    negative_slack_count = sum(s < 0 for s in slacks)
     print(f"\nChain Slack Metrics:")
     print(f"  Min slack: {min(slacks):.1f}m")
     print(f"  Max slack: {max(slacks):.1f}m")
-    print(f"  Negative slack count: {sum(1 for s in slacks if s < 0)}")
-    if any(s < 0 for s in slacks):
+    print(f"  Negative slack count: {negative_slack_count}")
+    if negative_slack_count:
         print(f"  ✗ Chain went slack (negative values detected)")
     else:
         print(f"  ✓ Chain never went slack")
 
     # Save data
-    with open('physics_test_data.json', 'w') as f:
-        json.dump(samples, f, indent=2)
-    print(f"\n✓ Data saved to physics_test_data.json")
+    # JSON Lines: one sample per line, so readers can stream it line by line
+    with open('physics_test_data.jsonl', 'w') as f:
+        f.writelines(json.dumps(sample) + '\n' for sample in samples)
+    # Run metadata lives beside it (absolute time = started + time_sec)
+    with open('physics_test_data.meta.json', 'w') as f:
+        json.dump({'started': started, 'interval_sec': 1, 'samples': len(samples)}, f, indent=2)
+    print(f"\n✓ Data saved to physics_test_data.jsonl (+ physics_test_data.meta.json)")
 
     return True
 
@@ -242,6 +256,5 @@ def main():
     return True
 
 if __name__ == '__main__':
-    import sys
     success = main()
     sys.exit(0 if success else 1)
@@ -5,157 +5,125 @@ Runs autoDrop, monitors until 5:1 scope reached, then resets and analyzes.
 """
 
 import json
+import math
+import sys
 import time
-import urllib.request
-import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
-auth_token = None
+# Add validation/utils to path so we can import common
+sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
+import common
+from common import ANCHOR_COMMAND_BODIES, JSON_HEADERS, http_request
+from common import open_sample_stream, write_sample, close_sample_stream
+
+COMMAND_URL = "http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/command"
+
+# Content-Type + Bearer token for command PUTs, built once at login.
+# The token itself is cached by common.get_auth_token().
+auth_headers = None
+
+# Fetches the next sample while the main thread sleeps out the interval
+sample_executor = ThreadPoolExecutor(max_workers=1)
 
 def get_auth_token():
     """Get authentication token from SignalK server"""
-    global auth_token
-    try:
-        url = "http://localhost:80/signalk/v1/auth/login"
-        credentials = {"username": "admin", "password": "signalk"}
-        data = json.dumps(credentials).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            result = json.loads(response.read())
-            auth_token = result.get('token')
-            if auth_token:
-                print(f"✓ Authentication successful")
-                return True
-            else:
-                print(f"✗ No token in response")
-                return False
-    except Exception as e:
-        print(f"✗ Authentication failed: {e}")
+    global auth_headers
+    token = common.get_auth_token()
+    if not token:
+        print(f"✗ Authentication failed")
         return False
+    auth_headers = {**JSON_HEADERS, 'Authorization': f'Bearer {token}'}
+    print(f"✓ Authentication successful")
+    return True
 
 def get_signalk_data(path=""):
     """Get data from SignalK server"""
     try:
         url = f"http://localhost:80/signalk/v1/api/vessels/self{path}"
-        with urllib.request.urlopen(url, timeout=3) as response:
-            return json.loads(response.read())
-    except:
+        return json.loads(http_request('GET', url, timeout=3))
+    except Exception:
         return None
 
 def send_command(command):
     """Send command to anchor controller (autoDrop or autoRetrieve)"""
-    global auth_token
     try:
-        url = f"http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/command"
-        data = json.dumps({"value": command}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
+        http_request('PUT', COMMAND_URL, ANCHOR_COMMAND_BODIES[command], auth_headers, timeout=2)
+        return True
     except Exception as e:
         print(f"✗ Error sending {command} command: {e}")
         return False
 
 def stop_controller():
     """Stop the chain controller"""
-    global auth_token
     try:
-        url = f"http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/command"
-        data = json.dumps({"value": "stop"}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except:
+        http_request('PUT', COMMAND_URL, ANCHOR_COMMAND_BODIES['stop'], auth_headers, timeout=2)
+        return True
+    except Exception:
         return False
 
 def reset_anchor():
-    """Reset anchor rode to 0m using standalone reset program"""
-    import subprocess
+    """Reset anchor rode to 0m and wait for the chain controller to confirm"""
+    print("Resetting anchor rode to 0m...")
     try:
-        result = subprocess.run(['python3', 'reset_anchor.py'],
-                              capture_output=True, text=True, timeout=20)
-        print(result.stdout)
-        return result.returncode == 0
+        if common.reset_anchor():
+            print("✓ Reset verified - rode is 0m")
+            return True
+        print("✗ Reset failed - rode did not reach 0m")
+        return False
     except Exception as e:
         print(f"✗ Reset error: {e}")
         return False
 
+def leaf_value(node, default=None):
+    """Unwrap a SignalK value published either bare or as {'value': ...}"""
+    if isinstance(node, dict):
+        node = node.get('value')
+    return default if node is None else node
+
 def get_current_metrics():
     """Get current position and deployment metrics"""
-    data = get_signalk_data()
-    if not data:
+    # Every field we read lives under navigation - skip the rest of the vessel tree
+    nav = get_signalk_data('/navigation')
+    if not nav:
         return None
 
-    nav = data.get('navigation', {})
     position = nav.get('position', {})
-    anchor = nav.get('anchor', {})
+    anchor = nav.get('anchor') or {}
 
     try:
-        # Get boat heading - published as radians in a dict, convert to degrees
-        heading_data = nav.get('headingTrue')
-        if heading_data is not None:
-            try:
-                if isinstance(heading_data, dict):
-                    heading_rad = float(heading_data.get('value', 0))
-                else:
-                    heading_rad = float(heading_data)
-                heading = (heading_rad * 180 / 3.14159265359) % 360
-            except:
-                heading = None
-        else:
-            heading = None
+        # Get boat heading - published as radians, convert to degrees
+        heading_rad = leaf_value(nav.get('headingTrue'))
+        heading = math.degrees(heading_rad) % 360 if heading_rad is not None else None
 
         # Get speed - speedOverGround is published as dict with value key
-        speed_data = nav.get('speedOverGround')
-        if speed_data is not None:
-            try:
-                if isinstance(speed_data, dict):
-                    boat_speed = float(speed_data.get('value', 0))
-                else:
-                    boat_speed = float(speed_data)
-            except:
-                boat_speed = 0
-        else:
-            boat_speed = 0
+        boat_speed = float(leaf_value(nav.get('speedOverGround'), 0))
 
         # Get position - may be nested in 'value'
-        pos_data = position.get('value')
-        if isinstance(pos_data, dict):
-            lat = pos_data.get('latitude')
-            lon = pos_data.get('longitude')
-        else:
-            lat = position.get('latitude')
-            lon = position.get('longitude')
-
-        metrics = {
-            'latitude': lat,
-            'longitude': lon,
+        pos_data = leaf_value(position, position)
+
+        return {
+            'latitude': pos_data.get('latitude'),
+            'longitude': pos_data.get('longitude'),
             'boat_speed': boat_speed,
             'boat_heading': heading,
-            'distance': anchor.get('distanceFromBow', {}).get('value'),
-            'rode_deployed': anchor.get('rodeDeployed', {}).get('value'),
-            'chain_slack': anchor.get('chainSlack', {}).get('value', 0),
-            'depth': nav.get('waterDepth', {}).get('value', 3.0),
+            'distance': (anchor.get('distanceFromBow') or {}).get('value'),
+            'rode_deployed': (anchor.get('rodeDeployed') or {}).get('value'),
+            'chain_slack': (anchor.get('chainSlack') or {}).get('value', 0),
+            'depth': (nav.get('waterDepth') or {}).get('value', 3.0),
         }
-        return metrics
-    except:
+    except (AttributeError, TypeError, ValueError):
+        # Malformed value in the tree - skip this sample
         return None
 
-def check_scope_reached(samples, target_scope=5.0, expected_depth=3.0, bow_height=2.0):
-    """Check if target scope has been reached"""
-    if not samples:
-        return False, 0, 0
+def check_scope_reached(metrics, target_scope=5.0, expected_depth=3.0, bow_height=2.0):
+    """Check if target scope has been reached in the latest sample"""
+    rode = metrics.get('rode_deployed') or 0
+    depth = metrics.get('depth')
 
-    final = samples[-1]
-    rode = final.get('rode_deployed', 0)
-    depth = final.get('depth', expected_depth)
-
-    if depth <= 0:
+    # Missing, null or non-positive depth readings fall back to the expected depth
+    if depth is None or depth <= 0:
         depth = expected_depth
 
     scope = rode / (depth + bow_height) if (depth + bow_height) > 0 else 0
@@ -175,6 +143,8 @@ def run_test():
         return False
 
     print("[2/5] Stopping chain controller...")
+    # Open the sampler's keep-alive connection while the stop PUT is in flight
+    sample_executor.submit(get_signalk_data, '/navigation')
     stop_controller()
     time.sleep(1)
 
@@ -201,27 +171,40 @@ def run_test():
 
     print("✓ autoDrop started - monitoring until 5:1 scope reached\n")
 
-    samples = []
+    # Stream samples to disk as they arrive rather than holding all of them
+    filename = f"autodrop_20kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    sample_file = open_sample_stream(filename)
+    sample_count = 0
+    last_sample = None
     start_time = time.time()
     last_print = start_time
     scope_reached = False
     final_scope = 0
     final_rode = 0
 
+    requested = start_time
+    next_tick = time.monotonic()
+    pending = sample_executor.submit(get_current_metrics)
     while time.time() - start_time < 240:  # Run for 240 seconds (4 minutes) to capture full deployment and boat movement
-        metrics = get_current_metrics()
-        elapsed = time.time() - start_time
+        metrics = pending.result()
+        elapsed = requested - start_time
 
         if metrics:
             metrics['time_sec'] = elapsed
-            samples.append(metrics)
+            write_sample(sample_file, metrics, sample_count)
+            sample_count += 1
+            last_sample = metrics
 
             # Check if scope reached
-            is_complete, rode, scope = check_scope_reached(samples)
+            is_complete, rode, scope = check_scope_reached(metrics)
 
             if (elapsed - last_print) >= 3:
-                heading_str = f"Heading={metrics['boat_heading']:6.1f}°" if metrics['boat_heading'] else "Heading=None"
-                print(f"  {elapsed:6.0f}s: Rode={rode:6.1f}m  Dist={metrics['distance']:6.1f}m  Speed={metrics['boat_speed']:5.2f}m/s  {heading_str}  Scope={scope:5.2f}:1")
+                # Compare against None: a 0.0° (due north) heading is valid
+                heading = metrics['boat_heading']
+                heading_str = f"Heading={heading:6.1f}°" if heading is not None else "Heading=None"
+                distance = metrics['distance']
+                dist_str = f"{distance:6.1f}m" if distance is not None else "  None"
+                print(f"  {elapsed:6.0f}s: Rode={rode:6.1f}m  Dist={dist_str}  Speed={metrics['boat_speed']:5.2f}m/s  {heading_str}  Scope={scope:5.2f}:1")
                 last_print = elapsed
 
             if is_complete and not scope_reached:
@@ -230,32 +213,34 @@ def run_test():
                 final_rode = rode
                 print(f"\n✓ TARGET SCOPE REACHED: {final_scope:.2f}:1 (rode={final_rode:.1f}m)")
 
-        # Adaptive sampling: faster during critical 5-10m rode range
-        if metrics and 5 <= metrics.get('rode_deployed', 0) <= 10:
-            time.sleep(0.05)  # 20Hz sampling during critical range
-        else:
-            time.sleep(0.1)   # 10Hz sampling rest of time
+        # Issue the next request before sleeping so its round trip overlaps
+        # the sample interval instead of adding to it
+        requested = time.time()
+        pending = sample_executor.submit(get_current_metrics)
+
+        # Adaptive sampling: 20Hz during critical 5-10m rode range, 10Hz rest of time
+        interval = 0.05 if metrics and 5 <= (metrics['rode_deployed'] or 0) <= 10 else 0.1
+        # Sleep until the next tick rather than a fixed interval so request and
+        # processing time don't stretch the spacing; never queue catch-up bursts
+        next_tick = max(next_tick + interval, time.monotonic())
+        time.sleep(max(0, next_tick - time.monotonic()))
 
     if not scope_reached:
         print(f"\n⚠ Test ended without reaching target scope")
-        if samples:
-            final = samples[-1]
-            rode = final.get('rode_deployed', 0)
+        if last_sample:
+            rode = last_sample.get('rode_deployed', 0)
             scope = rode / 5.0  # Approx with 3m depth + 2m bow
             print(f"  Final: Rode={rode:.1f}m, Approximate scope={scope:.2f}:1")
 
     # Save data
     print("\n[5/5] Saving test data and resetting...")
-    filename = f"autodrop_20kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w') as f:
-        json.dump({
-            'test_type': 'autoDrop_simplified',
-            'wind_speed_kn': 20,
-            'samples': samples,
-            'scope_reached': scope_reached,
-            'final_scope': final_scope,
-            'final_rode': final_rode
-        }, f, indent=2)
+    close_sample_stream(sample_file, {
+        'test_type': 'autoDrop_simplified',
+        'wind_speed_kn': 20,
+        'scope_reached': scope_reached,
+        'final_scope': final_scope,
+        'final_rode': final_rode
+    })
 
     print(f"✓ Data saved to {filename}")
 
@@ -7,14 +7,27 @@ Records: position, heading, chain deployed, slack, wind direction, and other met
 """
 
 import json
+import math
+import statistics
+import sys
 import time
-import urllib.request
-import urllib.error
 from datetime import datetime
+from pathlib import Path
 import os
 
-# Global token for authenticated requests
+# Add validation/utils to path so we can import common
+sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
+from common import ANCHOR_COMMAND_BODIES, JSON_HEADERS, LOGIN_BODY, http_request
+from common import METERS_TO_LAT, METERS_TO_LON
+from common import open_sample_stream, write_sample, close_sample_stream
+
+SIGNALK_URL = "http://localhost:80/signalk/v1/api/vessels/self"
+COMMAND_URL = f"{SIGNALK_URL}/navigation/anchor/command"
+PLUGIN_URL = "http://localhost:80/plugins/signalk-anchorAlarmConnector"
+
+# Global token for authenticated requests, and the headers carrying it
 auth_token = None
+auth_headers = None  # Content-Type + Bearer token, built once per login
 
 # Stage tracking for clear test progression visibility
 current_stage = None
@@ -56,23 +69,18 @@ def report_stage(stage_key):
 
 def get_auth_token():
     """Get authentication token from SignalK server"""
-    global auth_token
+    global auth_token, auth_headers
     try:
         url = "http://localhost:80/signalk/v1/auth/login"
-        credentials = {"username": "admin", "password": "signalk"}
-        data = json.dumps(credentials).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            result = json.loads(response.read())
-            auth_token = result.get('token')
-            if auth_token:
-                print(f"✓ Authentication successful")
-                return True
-            else:
-                print(f"✗ No token in response: {result}")
-                return False
+        result = json.loads(http_request('POST', url, LOGIN_BODY, JSON_HEADERS, timeout=2))
+        auth_token = result.get('token')
+        if auth_token:
+            auth_headers = {**JSON_HEADERS, 'Authorization': f'Bearer {auth_token}'}
+            print(f"✓ Authentication successful")
+            return True
+        else:
+            print(f"✗ No token in response: {result}")
+            return False
     except Exception as e:
         print(f"Error authenticating: {e}")
         return False
@@ -86,14 +94,8 @@ def stop_controller():
 
     try:
         # Send stop command with Bearer token
-        url = f"http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/command"
-        data = json.dumps({"value": "stop"}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            print(f"✓ STOP command sent to controller")
+        http_request('PUT', COMMAND_URL, ANCHOR_COMMAND_BODIES['stop'], auth_headers, timeout=2)
+        print(f"✓ STOP command sent to controller")
     except Exception as e:
         print(f"Warning: Error sending stop command: {e}")
         # Continue anyway - controller may be stopped
@@ -102,16 +104,15 @@ def stop_controller():
 
     # Verify controller is stopped
     try:
-        url = "http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/chainDirection"
-        with urllib.request.urlopen(url, timeout=2) as response:
-            result = json.loads(response.read())
-            chain_dir = result.get('value', 'unknown')
-            if chain_dir not in ['down', 'up']:
-                print(f"✓ Controller is stopped (chainDirection: {chain_dir})")
-                return True
-            else:
-                print(f"⚠ Controller still active (chainDirection: {chain_dir})")
-                return False
+        url = f"{SIGNALK_URL}/navigation/anchor/chainDirection"
+        result = json.loads(http_request('GET', url, timeout=2))
+        chain_dir = result.get('value', 'unknown')
+        if chain_dir not in ['down', 'up']:
+            print(f"✓ Controller is stopped (chainDirection: {chain_dir})")
+            return True
+        else:
+            print(f"⚠ Controller still active (chainDirection: {chain_dir})")
+            return False
     except Exception as e:
         print(f"Warning: Error verifying stop: {e}")
         return False
@@ -119,12 +120,9 @@ def stop_controller():
 def get_signalk_data(path=""):
     """Get data from SignalK server"""
     try:
-        url = f"http://localhost:80/signalk/v1/api/vessels/self{path}"
-        with urllib.request.urlopen(url, timeout=3) as response:
-            return json.loads(response.read())
-    except urllib.error.URLError as e:
-        return None
-    except (json.JSONDecodeError, Exception):
+        url = f"{SIGNALK_URL}{path}"
+        return json.loads(http_request('GET', url, timeout=3))
+    except Exception:
         return None
 
 def send_signalk_command(path, value):
@@ -137,15 +135,14 @@ def send_signalk_command(path, value):
     try:
         # Convert dots to slashes in path (e.g., "navigation.anchor.command" -> "navigation/anchor/command")
         clean_path = path.replace('.', '/')
-        url = f"http://localhost:80/signalk/v1/api/vessels/self/{clean_path}"
-        data = json.dumps({"value": value}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except (urllib.error.URLError, Exception) as e:
+        url = f"{SIGNALK_URL}/{clean_path}"
+        # Anchor commands are sent often - reuse their pre-encoded bodies
+        data = ANCHOR_COMMAND_BODIES.get(value) if isinstance(value, str) else None
+        if data is None:
+            data = json.dumps({"value": value}).encode('utf-8')
+        http_request('PUT', url, data, auth_headers, timeout=2)
+        return True
+    except Exception as e:
         print(f"Error sending SignalK command: {e}")
         return False
 
@@ -195,10 +192,10 @@ def reset_anchor():
         while time.time() < verify_timeout and attempt < 15:
             attempt += 1
             try:
-                # Get anchor data directly
-                nav = get_signalk_data("/navigation/anchor")
-                if nav and 'rodeDeployed' in nav:
-                    current_rode = nav['rodeDeployed'].get('value')
+                # Read just the rodeDeployed leaf rather than the whole anchor subtree
+                node = get_signalk_data("/navigation/anchor/rodeDeployed")
+                if node:
+                    current_rode = node.get('value')
                     if current_rode is not None:
                         # Success: rode is reset to 0 or very close to 0
                         if current_rode <= 0.5:
@@ -297,53 +294,28 @@ def autoretrieve_anchor():
     """Issue autoRetrieve command"""
     return send_signalk_command("navigation.anchor.command", "autoRetrieve")
 
-def motor_forward():
-    """Start motor moving forward toward anchor (via simulator endpoint)"""
-    global auth_token
+def motor_command(action):
+    """PUT a simulator motor endpoint ('motorforward', 'motorbackward' or 'motorstop')"""
     if not auth_token:
         if not get_auth_token():
             return False
     try:
-        url = "http://localhost:80/plugins/signalk-anchorAlarmConnector/motorforward"
-        req = urllib.request.Request(url, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except Exception as e:
+        http_request('PUT', f"{PLUGIN_URL}/{action}", None, auth_headers, timeout=2)
+        return True
+    except Exception:
         return False
 
+def motor_forward():
+    """Start motor moving forward toward anchor (via simulator endpoint)"""
+    return motor_command('motorforward')
+
 def motor_backward():
     """Start motor moving backward away from anchor (via simulator endpoint)"""
-    global auth_token
-    if not auth_token:
-        if not get_auth_token():
-            return False
-    try:
-        url = "http://localhost:80/plugins/signalk-anchorAlarmConnector/motorbackward"
-        req = urllib.request.Request(url, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except Exception as e:
-        return False
+    return motor_command('motorbackward')
 
 def motor_stop():
     """Stop motor (via simulator endpoint)"""
-    global auth_token
-    if not auth_token:
-        if not get_auth_token():
-            return False
-    try:
-        url = "http://localhost:80/plugins/signalk-anchorAlarmConnector/motorstop"
-        req = urllib.request.Request(url, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {auth_token}')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except Exception as e:
-        return False
+    return motor_command('motorstop')
 
 class SpeedMonitor:
     """Monitors boat speed and auto-engages motor if below threshold"""
@@ -418,17 +390,14 @@ def calculate_local_velocity(current_pos, current_time):
     if time_delta <= 0:
         return {'vel_x': 0, 'vel_y': 0, 'boat_speed': 0}
 
-    # Convert lat/lon to approximate meters (using constants from testSimulation.js)
-    METERS_TO_LAT = 0.000009
-    METERS_TO_LON = 0.0000125
-
+    # Convert lat/lon to approximate meters (constants match testSimulation.js)
     lat_delta_meters = (current_pos['latitude'] - _last_position['latitude']) / METERS_TO_LAT
     lon_delta_meters = (current_pos['longitude'] - _last_position['longitude']) / METERS_TO_LON
 
     # Calculate velocity in m/s
     vel_x = lon_delta_meters / time_delta
     vel_y = lat_delta_meters / time_delta
-    boat_speed = (vel_x**2 + vel_y**2)**0.5
+    boat_speed = math.hypot(vel_x, vel_y)
 
     # Update for next measurement
     _last_position = current_pos
@@ -436,16 +405,25 @@ def calculate_local_velocity(current_pos, current_time):
 
     return {'vel_x': vel_x, 'vel_y': vel_y, 'boat_speed': boat_speed}
 
-def get_current_metrics():
-    """Get current position, heading, and chain metrics with locally calculated velocity"""
-    data = get_signalk_data()
+def get_current_metrics(data=None):
+    """Get current position, heading, and chain metrics with locally calculated velocity
+
+    Args:
+        data: vessels/self document already fetched this tick (fetched if None)
+    """
+    if data is None:
+        data = get_signalk_data()
     if not data:
         return None
 
-    nav = data.get('navigation', {})
-    env = data.get('environment', {})
+    # Look each subtree up once; leaves are then read straight from it
+    nav = data.get('navigation') or {}
+    env = data.get('environment') or {}
+    anchor = nav.get('anchor') or {}
+    wind = env.get('wind') or {}
+    depth = env.get('depth') or {}
 
-    pos = nav.get('position', {}).get('value', {})
+    pos = (nav.get('position') or {}).get('value', {})
 
     if not isinstance(pos, dict) or pos.get('latitude') is None:
         return None
@@ -459,14 +437,14 @@ def get_current_metrics():
         'timestamp': current_time.isoformat(),
         'latitude': pos.get('latitude'),
         'longitude': pos.get('longitude'),
-        'heading': nav.get('headingTrue', {}).get('value', 0),
-        'heading_magnetic': nav.get('headingMagnetic', {}).get('value', 0),
-        'distance': nav.get('anchor', {}).get('distanceFromBow', {}).get('value', 0),
-        'rode_deployed': nav.get('anchor', {}).get('rodeDeployed', {}).get('value', 0),
-        'chain_slack': nav.get('anchor', {}).get('chainSlack', {}).get('value', 0),
-        'wind_speed': env.get('wind', {}).get('speedTrue', {}).get('value', 0),
-        'wind_direction': env.get('wind', {}).get('directionTrue', {}).get('value', 0),
-        'depth': env.get('depth', {}).get('belowSurface', {}).get('value', 0),
+        'heading': (nav.get('headingTrue') or {}).get('value', 0),
+        'heading_magnetic': (nav.get('headingMagnetic') or {}).get('value', 0),
+        'distance': (anchor.get('distanceFromBow') or {}).get('value', 0),
+        'rode_deployed': (anchor.get('rodeDeployed') or {}).get('value', 0),
+        'chain_slack': (anchor.get('chainSlack') or {}).get('value', 0),
+        'wind_speed': (wind.get('speedTrue') or {}).get('value', 0),
+        'wind_direction': (wind.get('directionTrue') or {}).get('value', 0),
+        'depth': (depth.get('belowSurface') or {}).get('value', 0),
         'velocity_x': velocity_data['vel_x'],
         'velocity_y': velocity_data['vel_y'],
         'boat_speed': velocity_data['boat_speed'],
@@ -491,7 +469,9 @@ def record_deployment(wind_speed_kn, duration_seconds=300):
     print(f"✓ autoDrop started - recording for {duration_seconds}s at {wind_speed_kn}kn wind")
     print(f"   Monitoring boat speed - motor will auto-engage if speed drops below threshold")
 
-    # Record data with speed monitoring
+    # Record data with speed monitoring, writing each sample to disk as it arrives
+    filename = f"autodrop_{wind_speed_kn}kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    sample_file = open_sample_stream(filename)
     samples = []
     start_time = time.time()
     last_print = start_time
@@ -499,6 +479,7 @@ def record_deployment(wind_speed_kn, duration_seconds=300):
     last_motor_action = start_time
     consecutive_none_count = 0
     max_consecutive_none = 10  # Exit early if we get 10 consecutive None responses
+    next_tick = time.monotonic()
 
     while time.time() - start_time < duration_seconds:
         metrics = get_current_metrics()
@@ -508,6 +489,7 @@ def record_deployment(wind_speed_kn, duration_seconds=300):
         if metrics:
             consecutive_none_count = 0  # Reset counter when we get valid data
             metrics['time_sec'] = elapsed
+            write_sample(sample_file, metrics, len(samples))
             samples.append(metrics)
 
             # Check and auto-engage motor every 2 seconds
@@ -539,24 +521,23 @@ def record_deployment(wind_speed_kn, duration_seconds=300):
             else:
                 print(f"  {elapsed:.0f}s: (waiting for valid position data)")
 
-        time.sleep(1)
+        # Sleep until the next 1s tick rather than a fixed 1s, so a slow reply
+        # or motor command doesn't push every later sample back
+        next_tick = max(next_tick + 1, time.monotonic())
+        time.sleep(max(0, next_tick - time.monotonic()))
+
+    close_sample_stream(sample_file, {
+        'test_type': 'autoDrop',
+        'wind_speed_kn': wind_speed_kn,
+        'duration_seconds': duration_seconds
+    })
 
     if not samples:
+        os.remove(filename)
         print("✗ No data collected")
         return None
 
     print(f"\n✓ Recording complete - {len(samples)} samples collected")
-
-    # Save data
-    filename = f"autodrop_{wind_speed_kn}kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w') as f:
-        json.dump({
-            'test_type': 'autoDrop',
-            'wind_speed_kn': wind_speed_kn,
-            'duration_seconds': duration_seconds,
-            'samples': samples
-        }, f, indent=2)
-
     print(f"✓ Data saved to {filename}")
 
     return {
@@ -592,6 +573,9 @@ def check_deployment_complete(samples, target_scope=5.0, expected_depth=3.0, bow
 
     return is_complete, final_rode, final_depth, final_scope, target_scope
 
+# Numeric sample fields summarized by analyze_deployment
+ANALYZED_FIELDS = ('boat_speed', 'distance', 'rode_deployed', 'chain_slack', 'heading')
+
 def analyze_deployment(deployment_data):
     """Analyze deployment test results"""
     if not deployment_data or not deployment_data['samples']:
@@ -605,10 +589,21 @@ def analyze_deployment(deployment_data):
     print(f"ANALYSIS - {wind_speed}kn WIND DEPLOYMENT")
     print(f"{'-'*70}")
 
-    # Extract boat speeds
-    boat_speeds = [s['boat_speed'] for s in samples if s.get('boat_speed') is not None and isinstance(s.get('boat_speed'), (int, float))]
+    # Extract every numeric column in one pass, skipping None/non-numeric values
+    columns = {key: [] for key in ANALYZED_FIELDS}
+    for sample in samples:
+        for key, column in columns.items():
+            value = sample.get(key)
+            if isinstance(value, (int, float)):
+                column.append(value)
+    boat_speeds = columns['boat_speed']
+    distances = columns['distance']
+    rodes = columns['rode_deployed']
+    slacks = columns['chain_slack']
+    headings = columns['heading']
+
     if boat_speeds:
-        avg_speed = sum(boat_speeds) / len(boat_speeds)
+        avg_speed = statistics.fmean(boat_speeds)
         max_speed = max(boat_speeds)
         min_speed = min(boat_speeds)
         low_speed_count = sum(1 for s in boat_speeds if s < 0.2)
@@ -619,13 +614,6 @@ def analyze_deployment(deployment_data):
         print(f"  Min speed: {min_speed:.3f} m/s")
         print(f"  Low speed periods (<0.2 m/s): {low_speed_count} samples")
 
-    # Extract metrics and filter out None values
-    distances = [s['distance'] for s in samples if s.get('distance') is not None and isinstance(s.get('distance'), (int, float))]
-    rodes = [s['rode_deployed'] for s in samples if s.get('rode_deployed') is not None and isinstance(s.get('rode_deployed'), (int, float))]
-    slacks = [s['chain_slack'] for s in samples if s.get('chain_slack') is not None and isinstance(s.get('chain_slack'), (int, float))]
-    headings = [s['heading'] for s in samples if s.get('heading') is not None and isinstance(s.get('heading'), (int, float))]
-    positions = [(s['latitude'], s['longitude']) for s in samples if s.get('latitude') is not None and s.get('longitude') is not None]
-
     print(f"\nDistance Metrics:")
     if distances and len(distances) > 0:
         print(f"  Initial: {distances[0]:.1f}m")
@@ -644,22 +632,22 @@ def analyze_deployment(deployment_data):
         print(f"  No valid rode data")
 
     print(f"\nSlack Analysis:")
-    if slacks and len(slacks) > 0:
+    if slacks:
+        negative_count = sum(1 for s in slacks if s < 0)
         print(f"  Min: {min(slacks):.1f}m")
         print(f"  Max: {max(slacks):.1f}m")
         print(f"  Final: {slacks[-1]:.1f}m")
-        print(f"  Negative instances: {sum(1 for s in slacks if s < 0)}")
+        print(f"  Negative instances: {negative_count}")
+        if negative_count:
+            print(f"  ✗ ISSUE: Slack went negative!")
+        else:
+            print(f"  ✓ Slack remained positive")
     else:
         print(f"  No valid slack data")
 
-    if slacks and any(s < 0 for s in slacks):
-        print(f"  ✗ ISSUE: Slack went negative!")
-    elif slacks and len(slacks) > 0:
-        print(f"  ✓ Slack remained positive")
-
     print(f"\nHeading Consistency:")
     if headings and len(headings) > 0:
-        heading_deg = [(h * 180 / 3.14159) % 360 for h in headings]
+        heading_deg = [math.degrees(h) % 360 for h in headings]
         print(f"  Initial: {heading_deg[0]:.1f}°")
         print(f"  Final: {heading_deg[-1]:.1f}°")
         print(f"  Variation: {max(heading_deg) - min(heading_deg):.1f}°")
@@ -695,15 +683,17 @@ def setup_environment():
 
     # Step 1: Verify SignalK is accessible
     print("\n[1/6] Verifying SignalK connection...", end="", flush=True)
-    if get_signalk_data():
+    vessel = get_signalk_data()
+    if vessel:
         print(" ✓")
     else:
         print(" ✗")
         return False
 
     # Step 2: Verify ESP device is connected and responding
+    # Reuse the document from step 1 rather than fetching it again
     print("[2/6] Verifying ESP device is connected...", end="", flush=True)
-    if get_current_metrics():
+    if get_current_metrics(vessel):
         print(" ✓")
     else:
         print(" ✗")
@@ -824,13 +814,17 @@ def main():
             print(f"✓ autoRetrieve started - monitoring for 5 minutes")
             print(f"   Monitoring boat speed - motor will auto-engage if needed")
 
-            retrieve_samples = []
+            # Retrieval samples only go to disk - nothing analyzes them in memory
+            filename = f"autoretrieve_{wind_speed}kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            sample_file = open_sample_stream(filename)
+            retrieve_count = 0
             start_time = time.time()
             last_print = start_time
             speed_monitor = SpeedMonitor(operation_type='retrieve', min_speed_threshold=0.15)
             last_motor_action = start_time
             consecutive_none_count = 0
             max_consecutive_none = 10  # Exit early if we get 10 consecutive None responses
+            next_tick = time.monotonic()
 
             while time.time() - start_time < 300:
                 metrics = get_current_metrics()
@@ -840,7 +834,8 @@ def main():
                 if metrics:
                     consecutive_none_count = 0  # Reset counter when we get valid data
                     metrics['time_sec'] = elapsed
-                    retrieve_samples.append(metrics)
+                    write_sample(sample_file, metrics, retrieve_count)
+                    retrieve_count += 1
 
                     # Check and auto-engage motor every 2 seconds during retrieval
                     if current_time - last_motor_action >= 2:
@@ -869,18 +864,17 @@ def main():
                     else:
                         print(f"  {elapsed:.0f}s: (waiting for valid position data)")
 
-                time.sleep(1)
+                next_tick = max(next_tick + 1, time.monotonic())
+                time.sleep(max(0, next_tick - time.monotonic()))
 
-            # Save retrieval data
-            if retrieve_samples:
-                filename = f"autoretrieve_{wind_speed}kn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                with open(filename, 'w') as f:
-                    json.dump({
-                        'test_type': 'autoRetrieve',
-                        'wind_speed_kn': wind_speed,
-                        'samples': retrieve_samples
-                    }, f, indent=2)
+            close_sample_stream(sample_file, {
+                'test_type': 'autoRetrieve',
+                'wind_speed_kn': wind_speed
+            })
+            if retrieve_count:
                 print(f"✓ Retrieval data saved to {filename}")
+            else:
+                os.remove(filename)
         else:
             print("✗ Failed to start autoRetrieve")
 
@@ -911,6 +905,5 @@ def main():
     return True
 
 if __name__ == '__main__':
-    import sys
     success = main()
     sys.exit(0 if success else 1)
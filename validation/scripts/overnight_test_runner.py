@@ -5,17 +5,22 @@ Autonomous test runner - executes all 56 tests with full data collection and ana
 Run once and walk away - handles all phases automatically
 """
 
+import atexit
 import json
 import os
 import sys
 import time
-import subprocess
 from datetime import datetime
 from pathlib import Path
-import urllib.request
-import urllib.error
 import math
 import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# Add validation/utils to path so we can import common
+sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
+import common
+from common import http_request, authorized_request, get_navigation, nav_value, ANCHOR_COMMAND_BODIES, esp32_reachable
+from common import open_sample_stream, write_sample, close_sample_stream
 
 # Configuration
 BASE_URL = "http://localhost:80"
@@ -24,6 +29,7 @@ TEST_DIR = SCRIPTS_DIR.parent / 'data'  # validation/data/ directory
 SESSION_DIR = None
 PROGRESS_FILE = None
 TEST_LOG = None
+LOG_FILE = None  # TEST_LOG handle, kept open for the whole session
 # Dynamic timeout based on depth - deeper deployments take longer
 # Base: 300s (5 min) + 60s per meter of depth
 # 3m: 480s (8 min), 5m: 600s (10 min), 8m: 780s (13 min), 12m: 1020s (17 min)
@@ -34,22 +40,31 @@ def get_test_timeout(depth_m):
     return base_timeout + (depth_m * depth_factor)
 
 SAMPLE_INTERVAL = 0.5  # 500ms sampling
+RAD_TO_DEG = 180.0 / math.pi  # Precomputed for per-sample heading conversion
 MAX_RETRIES = 2
+CHAIN_CHECK_TTL = 60  # seconds a successful chain controller check stays valid
 
 # Test matrix
 WIND_SPEEDS = [1, 4, 8, 12, 18, 20, 25]  # knots (1kn tests motor functions)
 DEPTHS = [3, 5, 8, 12]  # meters (max 12m to stay within 80m chain @ 5:1 scope)
 TEST_TYPES = ['autoDrop', 'autoRetrieve']
 
+# Fetches the simulation state while the main thread reads SignalK
+sample_executor = ThreadPoolExecutor(max_workers=1)
+
 # Global counters
 total_tests = len(WIND_SPEEDS) * len(DEPTHS) * len(TEST_TYPES)
 tests_completed = 0
 tests_passed = 0
 tests_failed = 0
 
+# State carried between tests to skip redundant setup
+chain_ok_at = None  # monotonic time of last successful chain controller check
+last_env = None     # (wind_speed, depth) last applied to the simulation
+
 def setup_session():
     """Create session directory and initialize logging"""
-    global SESSION_DIR, PROGRESS_FILE, TEST_LOG
+    global SESSION_DIR, PROGRESS_FILE, TEST_LOG, LOG_FILE
 
     session_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     SESSION_DIR = TEST_DIR / f'overnight_tests_{session_timestamp}'
@@ -63,32 +78,35 @@ def setup_session():
     PROGRESS_FILE = SESSION_DIR / 'PROGRESS.txt'
     TEST_LOG = SESSION_DIR / 'TEST_LOG.md'
 
-    # Initialize test log
-    with open(TEST_LOG, 'w') as f:
-        f.write('# Overnight Test Session Log\n\n')
-        f.write(f'Started: {datetime.now().isoformat()}\n')
-        f.write(f'Test Matrix: {len(WIND_SPEEDS)} wind speeds × {len(DEPTHS)} depths × {len(TEST_TYPES)} test types = {total_tests} tests\n')
-        f.write(f'Session Directory: {SESSION_DIR}\n\n')
-        f.write('## Progress\n\n')
+    # Initialize test log - opened once and line buffered so `tail -f` stays
+    # live without an open/close per log line
+    LOG_FILE = open(TEST_LOG, 'w', buffering=1)
+    atexit.register(LOG_FILE.close)
+    LOG_FILE.write('# Overnight Test Session Log\n\n')
+    LOG_FILE.write(f'Started: {datetime.now().isoformat()}\n')
+    LOG_FILE.write(f'Test Matrix: {len(WIND_SPEEDS)} wind speeds × {len(DEPTHS)} depths × {len(TEST_TYPES)} test types = {total_tests} tests\n')
+    LOG_FILE.write(f'Session Directory: {SESSION_DIR}\n\n')
+    LOG_FILE.write('## Progress\n\n')
 
     print(f'[SETUP] Session directory: {SESSION_DIR}')
     return SESSION_DIR
 
 def log_test(message):
     """Append to test log"""
-    with open(TEST_LOG, 'a') as f:
-        f.write(message + '\n')
+    LOG_FILE.write(message + '\n')
     print(message)
 
 def update_progress(test_num, wind, depth, test_type, status):
     """Update progress file"""
-    with open(PROGRESS_FILE, 'w') as f:
-        f.write(f'Test {test_num}/{total_tests}\n')
-        f.write(f'Current: {test_type} @ {wind}kn, {depth}m\n')
-        f.write(f'Status: {status}\n')
-        f.write(f'Completed: {tests_completed}\n')
-        f.write(f'Passed: {tests_passed}\n')
-        f.write(f'Failed: {tests_failed}\n')
+    # Only called on phase transitions (RUNNING/DONE/FAILED) - one write per update
+    PROGRESS_FILE.write_text(
+        f'Test {test_num}/{total_tests}\n'
+        f'Current: {test_type} @ {wind}kn, {depth}m\n'
+        f'Status: {status}\n'
+        f'Completed: {tests_completed}\n'
+        f'Passed: {tests_passed}\n'
+        f'Failed: {tests_failed}\n'
+    )
 
     # Also publish to SignalK
     publish_test_progress(test_num, wind, depth, test_type, status)
@@ -139,37 +157,27 @@ def publish_test_progress(test_num, wind, depth, test_type, status):
         # Post delta to SignalK
         delta_url = f"{BASE_URL}/signalk/v1/api/delta"
         data = json.dumps(delta).encode('utf-8')
-        req = urllib.request.Request(delta_url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            pass  # Success
+        authorized_request('POST', delta_url, token, data)
 
     except Exception as e:
         # Don't fail tests if SignalK publish fails
         pass
 
 def get_auth_token():
-    """Get authentication token"""
-    try:
-        url = f"{BASE_URL}/signalk/v1/auth/login"
-        data = json.dumps({"username": "admin", "password": "signalk"}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read()).get('token')
-    except Exception as e:
-        log_test(f'✗ Failed to get token: {e}')
-        return None
+    """Get authentication token (cached by common until shortly before expiry)"""
+    token = common.get_auth_token()
+    if not token:
+        log_test('✗ Failed to get token')
+    return token
 
 def verify_server():
     """Verify SignalK and plugin are running"""
     try:
-        # Check SignalK server
-        urllib.request.urlopen(f"{BASE_URL}/signalk", timeout=5).close()
-        # Check if we can get a token (proves plugin is loaded and auth works)
+        # Check SignalK server on the sampler thread while fetching a token
+        # (proves plugin is loaded and auth works) - one round-trip, not two
+        probe = sample_executor.submit(http_request, 'GET', f"{BASE_URL}/signalk")
         token = get_auth_token()
+        probe.result()
         if token:
             return True
         return False
@@ -178,88 +186,71 @@ def verify_server():
 
 def check_chain_controller():
     """Check if chain controller (ESP32) is responding via SignalK"""
+    # Fail fast without an auth/SignalK round-trip when the ESP32 is off the network
+    if not esp32_reachable():
+        return False, "ESP32 unreachable"
+
     try:
         token = get_auth_token()
         if not token:
             return False, "No auth token"
 
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/rodeDeployed"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read())
-            source = data.get('$source', '')
-            # Chain controller source starts with 'ws.' (websocket connection)
-            if source.startswith('ws.'):
-                return True, f"Connected via {source[:20]}..."
-            else:
-                return False, f"Unexpected source: {source}"
+        data = json.loads(authorized_request('GET', url, token))
+        source = data.get('$source', '')
+        # Chain controller source starts with 'ws.' (websocket connection)
+        if source.startswith('ws.'):
+            return True, f"Connected via {source[:20]}..."
+        else:
+            return False, f"Unexpected source: {source}"
     except Exception as e:
         return False, str(e)
 
 def restart_chain_controller():
-    """Restart the ESP32 chain controller"""
-    ESP32_IP = "192.168.20.217"
-    try:
-        log_test(f"  Restarting chain controller at {ESP32_IP}...")
-        url = f"http://{ESP32_IP}/api/device/restart"
-        req = urllib.request.Request(url, method='POST')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            pass
-        # Wait for ESP32 to restart and reconnect
-        log_test("  Waiting 15s for ESP32 to restart...")
-        time.sleep(15)
-
-        # Verify it reconnected
-        for attempt in range(5):
-            ok, msg = check_chain_controller()
-            if ok:
-                log_test(f"  ✓ Chain controller reconnected: {msg}")
-                return True
-            time.sleep(3)
-
+    """Restart the ESP32 chain controller and record the outcome in the test log"""
+    log_test("  Restarting chain controller...")
+    ok = common.restart_chain_controller()
+    if ok:
+        log_test("  ✓ Chain controller reconnected")
+    else:
         log_test("  ✗ Chain controller did not reconnect after restart")
-        return False
-    except Exception as e:
-        log_test(f"  ✗ Failed to restart chain controller: {e}")
-        return False
+    return ok
 
 def ensure_chain_controller():
     """Ensure chain controller is responsive, restart if needed"""
-    ok, msg = check_chain_controller()
-    if ok:
+    global chain_ok_at
+    if chain_ok_at is not None and time.monotonic() - chain_ok_at < CHAIN_CHECK_TTL:
         return True
 
-    log_test(f"! Chain controller not responding: {msg}")
-    return restart_chain_controller()
+    ok, msg = check_chain_controller()
+    if not ok:
+        log_test(f"! Chain controller not responding: {msg}")
+        ok = restart_chain_controller()
 
-def reset_anchor():
+    chain_ok_at = time.monotonic() if ok else None
+    return ok
+
+def reset_anchor(token):
     """Reset anchor to 0m rode"""
     try:
-        subprocess.run(['python3', str(SCRIPTS_DIR / 'reset_anchor.py')],
-                      timeout=10, capture_output=True)
+        ok = common.reset_anchor(token)
         time.sleep(3)
-        return True
+        return ok
     except:
         return False
 
-def stop_chain():
+def stop_chain(token):
     """Stop any running chain operations"""
     try:
-        subprocess.run(['python3', str(SCRIPTS_DIR / 'stop_chain.py')],
-                      timeout=5, capture_output=True)
+        ok = common.stop_chain(token)
         time.sleep(1)
-        return True
+        return ok
     except:
         return False
 
-def configure_environment(wind_speed, depth):
+def configure_environment(token, wind_speed, depth):
     """Set wind speed and depth using correct config structure"""
     try:
-        token = get_auth_token()
-        if not token:
-            return False
-
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/config"
         # Use correct nested structure matching simulationConfig.js
         data = json.dumps({
@@ -272,14 +263,10 @@ def configure_environment(wind_speed, depth):
             }
         }).encode('utf-8')
 
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            result = json.loads(response.read())
-            # Config endpoint returns the new config, not a success flag
-            return result is not None
+        response = authorized_request('PUT', url, token, data)
+        result = json.loads(response)
+        # Config endpoint returns the new config, not a success flag
+        return result is not None
     except Exception as e:
         log_test(f'  ! Config error: {e}')
         return False
@@ -288,30 +275,19 @@ def get_simulation_state(token):
     """Get current simulation state including forces and boat state"""
     try:
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/state"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except Exception as e:
         # Log endpoint failures for debugging
         # Return empty dict instead of None so data collection continues
         # (sim_state is optional for test success)
         return {}
 
-def reset_simulation():
+def reset_simulation(token):
     """Reset simulation to initial state (after config change)"""
     try:
-        token = get_auth_token()
-        if not token:
-            return False
-
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/reset"
-        req = urllib.request.Request(url, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return True
+        authorized_request('PUT', url, token)
+        return True
     except Exception as e:
         log_test(f'  ! Simulation reset error: {e}')
         return False
@@ -320,10 +296,7 @@ def get_position(token):
     """Get boat position"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/position/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -331,22 +304,16 @@ def get_speed(token):
     """Get boat speed"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/speedOverGround/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
 def get_heading(token):
-    """Get boat heading in degrees"""
+    """Get boat heading in degrees (0-360)"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/headingTrue/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            rad = json.loads(response.read())
-            return rad * 180 / math.pi
+        rad = json.loads(authorized_request('GET', url, token))
+        return (rad * RAD_TO_DEG + 360) % 360
     except:
         return None
 
@@ -354,10 +321,7 @@ def get_rode_deployed(token):
     """Get rode deployed from SignalK (from chain controller)"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/rodeDeployed/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -365,10 +329,7 @@ def get_scope(token):
     """Get scope ratio from SignalK"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/scope/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -376,10 +337,7 @@ def get_anchor_command(token):
     """Get current anchor command state (autoDrop/autoRetrieve/idle)"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/command/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -387,10 +345,7 @@ def get_chain_direction(token):
     """Get chain direction (up/down/idle)"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/chainDirection/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -398,10 +353,7 @@ def get_anchor_position(token):
     """Get anchor position (lat/lon/altitude)"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/position/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -409,10 +361,7 @@ def get_auto_stage(token):
     """Get current auto operation stage"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/autoStage/value"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -420,12 +369,8 @@ def send_command(token, command):
     """Send anchor control command via SignalK PUT handler"""
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/navigation/anchor/command"
-        data = json.dumps({"value": command}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read().decode())
+        data = ANCHOR_COMMAND_BODIES.get(command) or json.dumps({"value": command}).encode('utf-8')
+        return json.loads(authorized_request('PUT', url, token, data))
     except Exception as e:
         return {'error': str(e)}
 
@@ -447,13 +392,9 @@ def send_test_notification(token, test_num, total_tests, test_type, wind_kn, dep
     }
 
     try:
-        req = urllib.request.Request(url,
-                                     data=json.dumps(notification).encode('utf-8'),
-                                     headers=headers,
-                                     method='PUT')
-        with urllib.request.urlopen(req, timeout=10) as response:
-            log_test(f"  ✓ Test notification sent to chain controller")
-            return True
+        http_request('PUT', url, json.dumps(notification).encode('utf-8'), headers, timeout=10)
+        log_test(f"  ✓ Test notification sent to chain controller")
+        return True
     except Exception as e:
         log_test(f"  ⚠ Warning: Could not send test notification: {e}")
         return False
@@ -461,18 +402,26 @@ def send_test_notification(token, test_num, total_tests, test_type, wind_kn, dep
 def collect_sample(token, start_pos, start_lat, start_lon, start_time):
     """Collect single telemetry sample"""
     try:
-        pos = get_position(token)
-        speed = get_speed(token)
-        heading = get_heading(token)
-        sim_state = get_simulation_state(token)
-        rode_deployed = get_rode_deployed(token)
-        scope = get_scope(token)
+        # One request for all SignalK navigation paths instead of one per path,
+        # overlapped with the independent simulation state request
+        sim_future = sample_executor.submit(get_simulation_state, token)
+        nav = get_navigation(token)
+        sim_state = sim_future.result()
+        if not nav:
+            return None
+
+        pos = nav_value(nav, 'position')
+        speed = nav_value(nav, 'speedOverGround')
+        heading_rad = nav_value(nav, 'headingTrue')
+        heading = (heading_rad * RAD_TO_DEG + 360) % 360 if heading_rad is not None else None
+        rode_deployed = nav_value(nav, 'anchor', 'rodeDeployed')
+        scope = nav_value(nav, 'anchor', 'scope')
 
         # Critical windlass state data for debugging deployment issues
-        anchor_command = get_anchor_command(token)
-        chain_direction = get_chain_direction(token)
-        anchor_position = get_anchor_position(token)
-        auto_stage = get_auto_stage(token)
+        anchor_command = nav_value(nav, 'anchor', 'command')
+        chain_direction = nav_value(nav, 'anchor', 'chainDirection')
+        anchor_position = nav_value(nav, 'anchor', 'position')
+        auto_stage = nav_value(nav, 'anchor', 'autoStage')
 
         # Position, speed, and heading are required for a valid sample
         if not (pos and speed is not None and heading is not None):
@@ -490,7 +439,7 @@ def collect_sample(token, start_pos, start_lat, start_lon, start_time):
                 'latitude': pos['latitude'],
                 'longitude': pos['longitude'],
                 'speed': speed,
-                'heading': heading % 360 if heading else 0
+                'heading': heading
             },
             'distance_from_start': lat_delta,
             'rodeDeployed': rode_deployed,
@@ -513,7 +462,7 @@ def collect_sample(token, start_pos, start_lat, start_lon, start_time):
 
 def run_test(test_num, wind_speed, depth, test_type):
     """Run single test with full data collection"""
-    global tests_completed, tests_passed, tests_failed
+    global tests_completed, tests_passed, tests_failed, last_env
 
     test_name = f'{test_type}_wind{wind_speed}_depth{depth}'
     log_test(f'\n## Test {test_num}/{total_tests}: {test_name}')
@@ -538,7 +487,10 @@ def run_test(test_num, wind_speed, depth, test_type):
     # Phase 1: Reset and verify (only for autoDrop; autoRetrieve uses deployed anchor)
     if test_type == 'autoDrop':
         log_test(f'[PHASE 1] Resetting anchor...')
-        if not stop_chain() or not reset_anchor():
+        # Stop is best-effort (nothing may be running); the reset is what must succeed
+        if not stop_chain(token):
+            log_test(f'! Stop command failed - continuing with reset')
+        if not reset_anchor(token):
             log_test(f'✗ FAILED: Could not reset anchor')
             tests_failed += 1
             tests_completed += 1
@@ -547,23 +499,30 @@ def run_test(test_num, wind_speed, depth, test_type):
     else:
         log_test(f'[PHASE 1] Skipping reset (using deployed anchor from previous test)')
 
-    # Phase 2: Configure environment
+    # Phase 2: Configure environment (skipped when unchanged, e.g. the
+    # autoRetrieve that follows an autoDrop at the same setpoint)
     log_test(f'[PHASE 2] Configuring environment: {wind_speed}kn, {depth}m depth')
-    if not configure_environment(wind_speed, depth):
-        log_test(f'✗ FAILED: Could not configure environment')
-        tests_failed += 1
-        tests_completed += 1
-        return None
+    env_changed = last_env != (wind_speed, depth)
+    if env_changed:
+        if not configure_environment(token, wind_speed, depth):
+            log_test(f'✗ FAILED: Could not configure environment')
+            last_env = None
+            tests_failed += 1
+            tests_completed += 1
+            return None
+        last_env = (wind_speed, depth)
     # Reset simulation to apply new config with fresh state (autoDrop only)
     # autoRetrieve tests must preserve deployed rode from previous test
     if test_type == 'autoDrop':
-        if not reset_simulation():
+        if not reset_simulation(token):
             log_test(f'! Warning: Simulation reset failed, continuing anyway')
         time.sleep(1)  # Allow simulation to stabilize
         log_test(f'✓ Environment configured and simulation reset')
-    else:
+    elif env_changed:
         time.sleep(1)  # Allow config to stabilize
         log_test(f'✓ Environment configured (simulation NOT reset to preserve deployed rode)')
+    else:
+        log_test(f'✓ Environment unchanged from previous test (simulation NOT reset to preserve deployed rode)')
 
     # Send test notification to chain controller
     send_test_notification(token, test_num, total_tests, test_type, wind_speed, depth)
@@ -593,10 +552,14 @@ def run_test(test_num, wind_speed, depth, test_type):
         return None
     log_test(f'✓ Command sent: {command}')
 
-    # Collect data
-    samples = []
+    # Collect data - samples are streamed straight into the test file so a
+    # long test never holds them all in memory or stalls on one big dump
+    test_file = SESSION_DIR / 'raw_data' / f'test_{test_type}_{wind_speed}kn_{depth}m_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    sample_file = open_sample_stream(test_file)
+    sample_count = 0
+    latest = None
+    max_speed = 0
     test_start = time.time()
-    next_sample_time = test_start + SAMPLE_INTERVAL
     # Use dynamic timeout based on depth - deeper tests need more time
     max_duration = get_test_timeout(depth)
     failed_samples = 0
@@ -604,49 +567,57 @@ def run_test(test_num, wind_speed, depth, test_type):
 
     log_test(f'Test timeout: {max_duration}s ({max_duration/60:.1f} minutes) for {depth}m depth')
 
+    # Deadline scheduler on the monotonic clock: sleep exactly until the next
+    # sample is due instead of polling, immune to wall-clock adjustments
+    deadline = time.monotonic() + max_duration
+    next_sample_time = time.monotonic() + SAMPLE_INTERVAL
+
     try:
-        while time.time() - test_start < max_duration:
-            now = time.time()
-            if now >= next_sample_time:
-                sample = collect_sample(token, start_pos, start_lat, start_lon, test_start)
-                if sample:
-                    samples.append(sample)
-                    failed_samples = 0  # Reset failed counter on successful sample
-                else:
-                    failed_samples += 1
-                    # Abort if data collection is consistently failing
-                    if failed_samples >= max_failed_samples:
-                        log_test(f'! Aborting: {failed_samples} consecutive failed samples')
-                        break
-                next_sample_time = now + SAMPLE_INTERVAL
-
-            time.sleep(0.1)
-
-            # Check termination conditions only if we have samples
-            if len(samples) > 0:
-                latest = samples[-1]
-                if test_type == 'autoDrop':
-                    # Check if target scope reached (from SignalK path)
-                    scope = latest.get('scope')
-                    if scope is not None and scope >= 5.0:
-                        log_test(f'✓ Target scope reached: {scope:.1f}:1')
-                        break
-                elif test_type == 'autoRetrieve':
-                    # Check if rode retrieved (from SignalK path via chain controller)
-                    # Target is ≤ 2.0m (intentional safety stop, not 0m)
-                    rode = latest.get('rodeDeployed')
-                    if rode is not None and rode <= 2.0:
-                        log_test(f'✓ Rode retrieved to safety stop: {rode:.1f}m')
-                        break
+        while next_sample_time < deadline:
+            time.sleep(max(0, next_sample_time - time.monotonic()))
+            # Don't queue a burst of catch-up samples if a sample overran
+            next_sample_time = max(next_sample_time + SAMPLE_INTERVAL, time.monotonic())
+
+            sample = collect_sample(token, start_pos, start_lat, start_lon, test_start)
+            if not sample:
+                failed_samples += 1
+                # Abort if data collection is consistently failing
+                if failed_samples >= max_failed_samples:
+                    log_test(f'! Aborting: {failed_samples} consecutive failed samples')
+                    break
+                continue
+
+            if sample_count > 0:
+                # Simulation config is static for a whole test - record it on
+                # the first sample only instead of repeating it every 500ms
+                sample.get('simulation_state', {}).pop('config', None)
+            write_sample(sample_file, sample, sample_count)
+            sample_count += 1
+            latest = sample
+            max_speed = max(max_speed, sample['position']['speed'])
+            failed_samples = 0  # Reset failed counter on successful sample
+
+            # Check termination conditions
+            if test_type == 'autoDrop':
+                # Check if target scope reached (from SignalK path)
+                scope = latest.get('scope')
+                if scope is not None and scope >= 5.0:
+                    log_test(f'✓ Target scope reached: {scope:.1f}:1')
+                    break
+            elif test_type == 'autoRetrieve':
+                # Check if rode retrieved (from SignalK path via chain controller)
+                # Target is ≤ 2.0m (intentional safety stop, not 0m)
+                rode = latest.get('rodeDeployed')
+                if rode is not None and rode <= 2.0:
+                    log_test(f'✓ Rode retrieved to safety stop: {rode:.1f}m')
+                    break
     except KeyboardInterrupt:
         log_test('! Test interrupted by user')
     except Exception as e:
         log_test(f'! Error during data collection: {e}')
 
     # Phase 4: Save test data
-    log_test(f'[PHASE 4] Saving test data ({len(samples)} samples)...')
-
-    test_file = SESSION_DIR / 'raw_data' / f'test_{test_type}_{wind_speed}kn_{depth}m_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    log_test(f'[PHASE 4] Saving test data ({sample_count} samples)...')
 
     test_data = {
         'test_metadata': {
@@ -659,27 +630,23 @@ def run_test(test_num, wind_speed, depth, test_type):
             'start_time': datetime.fromtimestamp(start_time).isoformat() + 'Z',
             'end_time': datetime.now().isoformat() + 'Z',
             'duration_sec': time.time() - start_time,
-            'sample_count': len(samples),
+            'sample_count': sample_count,
             'completed': True,
-            'timeout': len(samples) == 0
-        },
-        'samples': samples
+            'timeout': sample_count == 0
+        }
     }
 
     # Calculate summary
-    if samples:
-        final_sample = samples[-1]
-
+    if latest is not None:
         test_data['summary'] = {
-            'final_scope': final_sample.get('scope', 0) or 0,
-            'final_rode': final_sample.get('rodeDeployed', 0) or 0,
-            'final_distance': final_sample.get('distance_from_start', 0),
-            'max_speed': max([s.get('position', {}).get('speed', 0) for s in samples]),
-            'final_speed': final_sample.get('position', {}).get('speed', 0),
+            'final_scope': latest.get('scope', 0) or 0,
+            'final_rode': latest.get('rodeDeployed', 0) or 0,
+            'final_distance': latest.get('distance_from_start', 0),
+            'max_speed': max_speed,
+            'final_speed': latest.get('position', {}).get('speed', 0),
         }
 
-    with open(test_file, 'w') as f:
-        json.dump(test_data, f, indent=2)
+    close_sample_stream(sample_file, test_data)
 
     log_test(f'✓ Test data saved: {test_file.name}')
 
@@ -692,7 +659,7 @@ def run_test(test_num, wind_speed, depth, test_type):
         passed = test_data.get('summary', {}).get('final_rode', float('inf')) <= 2.0
     else:
         # Fallback for unknown test types
-        passed = len(samples) > 0 and test_data.get('summary')
+        passed = sample_count > 0 and test_data.get('summary')
 
     if passed:
         tests_passed += 1
@@ -779,12 +746,7 @@ def publish_session_status(status, message=""):
 
         delta_url = f"{BASE_URL}/signalk/v1/api/delta"
         data = json.dumps(delta).encode('utf-8')
-        req = urllib.request.Request(delta_url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            pass
+        authorized_request('POST', delta_url, token, data)
     except:
         pass
 
@@ -4,31 +4,12 @@ Stop the chain controller immediately
 Sends stop command via SignalK: PUT to navigation.anchor.command with value='stop'
 """
 
-import json
-import time
-import urllib.request
-import urllib.error
 import sys
 from pathlib import Path
 
 # Add test/utils to path so we can import common
 sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
-from common import get_auth_token
-
-def stop_chain(token):
-    """Send stop command to chain controller"""
-    try:
-        url = "http://localhost:80/signalk/v1/api/vessels/self/navigation/anchor/command"
-        data = json.dumps({"value": "stop"}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return True
-    except Exception as e:
-        print(f"Error sending stop: {e}")
-        return False
+from common import get_auth_token, stop_chain
 
 def main():
     print("Stopping chain controller...")
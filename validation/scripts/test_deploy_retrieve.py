@@ -61,7 +61,7 @@ def send_cmd(token, cmd):
     req.add_header('Content-Type', 'application/json')
     req.add_header('Authorization', f'Bearer {token}')
     with urllib.request.urlopen(req, timeout=5) as response:
-        return json.loads(response.read().decode())
+        return json.loads(response.read())
 
 def configure_env(token, wind, depth):
     url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/config"
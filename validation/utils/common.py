@@ -6,11 +6,18 @@ This module provides shared functions used across multiple test scripts,
 eliminating code duplication and ensuring consistent behavior.
 """
 
+import base64
 import json
-import urllib.request
+import http.client
+import math
+import random
+import socket
+import threading
 import urllib.error
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urlsplit
 
 # Configuration
 BASE_URL = "http://localhost:80"
@@ -20,6 +27,113 @@ ESP32_IP = "192.168.20.217"
 METERS_TO_LAT = 0.000009
 METERS_TO_LON = 0.0000125
 BOW_HEIGHT = 2.0  # meters
+TOKEN_REFRESH_MARGIN = 30  # seconds - re-authenticate this long before expiry
+CONNECT_TIMEOUT = 1.0  # seconds - fail fast when a host is down (LAN/loopback only)
+
+# Constant request bodies and headers, encoded once at import
+JSON_HEADERS = {'Content-Type': 'application/json'}
+LOGIN_BODY = json.dumps({"username": "admin", "password": "signalk"}).encode('utf-8')
+ANCHOR_COMMAND_BODIES = {
+    command: json.dumps({"value": command}).encode('utf-8')
+    for command in ('autoDrop', 'autoRetrieve', 'stop', 'idle')
+}
+
+# Persistent connections keyed by (host, port), reused across requests.
+# Thread-local because an HTTPConnection can only carry one request at a time.
+_local = threading.local()
+
+# Resolved IPv4 addresses keyed by (host, port), so reconnects skip getaddrinfo
+_resolved_hosts = {}
+
+# Cached auth token and its expiry (epoch seconds), shared by all helpers
+_auth_token = None
+_auth_token_expiry = 0
+
+
+# =============================================================================
+# HTTP Transport
+# =============================================================================
+
+def resolve_host(host, port):
+    """Resolve a hostname to an IPv4 address once and cache it.
+
+    Resolving 'localhost' can return ::1 first, costing a failed IPv6
+    connect before falling back to IPv4, so the IPv4 address is preferred.
+
+    Returns:
+        str: IPv4 address, or host unchanged if it cannot be resolved
+    """
+    key = (host, port)
+    if key not in _resolved_hosts:
+        try:
+            info = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
+            _resolved_hosts[key] = info[0][4][0]
+        except socket.gaierror:
+            return host
+    return _resolved_hosts[key]
+
+
+def http_request(method, url, data=None, headers=None, timeout=5):
+    """Send an HTTP request over a persistent keep-alive connection.
+
+    Connections are pooled per host (and per thread) so repeated calls to the
+    SignalK server skip the TCP connect/close that urllib.request pays on
+    every request. A request on a reused connection that the server has
+    since closed is retried once on a fresh connection. New connections
+    give up after CONNECT_TIMEOUT; `timeout` only bounds the response.
+
+    Args:
+        method: HTTP method ('GET', 'PUT', 'POST')
+        url: Full URL (e.g., f"{BASE_URL}/signalk/v1/api/vessels/self")
+        data: Optional request body as bytes
+        headers: Optional dict of request headers
+        timeout: Response read timeout in seconds
+
+    Returns:
+        bytes: Response body
+
+    Raises:
+        urllib.error.HTTPError: On a 4xx/5xx response (same as urlopen)
+        OSError, http.client.HTTPException: On connection failure
+    """
+    parts = urlsplit(url)
+    key = (parts.hostname, parts.port or 80)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+
+    connections = _local.__dict__.setdefault('connections', {})
+    while True:
+        conn = connections.get(key)
+        reused = conn is not None
+        if not reused:
+            conn = http.client.HTTPConnection(resolve_host(*key), key[1],
+                                              timeout=CONNECT_TIMEOUT)
+            connections[key] = conn
+
+        try:
+            if conn.sock is None:
+                conn.connect()
+            conn.sock.settimeout(timeout)
+            # Keep the original Host header rather than the resolved address
+            conn.request(method, target, body=data,
+                         headers={'Host': parts.netloc, **(headers or {})})
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            connections.pop(key, None)
+            if reused and isinstance(e, ConnectionError):
+                continue  # Server closed the idle socket - retry on a new one
+            raise
+
+        if response.will_close:
+            conn.close()
+            connections.pop(key, None)
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason,
+                                         response.headers, None)
+        return body
 
 
 # =============================================================================
@@ -61,30 +175,93 @@ def get_device_token():
         return None
 
 
+def get_token_expiry(token):
+    """Read the expiry time from a JWT's 'exp' claim.
+
+    Returns:
+        float: Expiry as epoch seconds, or None if the token has no 'exp' claim
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+    except Exception:
+        return None
+
+
+def invalidate_auth_token():
+    """Drop the cached token so the next get_auth_token() re-authenticates.
+
+    Called after the server rejects a token with 401 Unauthorized.
+    """
+    global _auth_token, _auth_token_expiry
+    _auth_token = None
+    _auth_token_expiry = 0
+
+
 def get_auth_token():
     """Get authentication token from SignalK server.
 
     Tries device token first (preferred), falls back to user login if unavailable.
+    The token is cached until shortly before it expires, so helpers can call
+    this on every request without logging in again.
 
     Returns:
         str: JWT token if successful, None otherwise
     """
+    global _auth_token, _auth_token_expiry
+    if _auth_token and time.time() < _auth_token_expiry - TOKEN_REFRESH_MARGIN:
+        return _auth_token
+
     # Try device token first (more reliable, can be permanent)
     token = get_device_token()
-    if token:
-        return token
 
     # Fallback to user login if device token not available
-    try:
-        url = f"{BASE_URL}/signalk/v1/auth/login"
-        data = json.dumps({"username": "admin", "password": "signalk"}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read()).get('token')
-    except Exception as e:
-        print(f"Auth error: {e}")
-        return None
+    if not token:
+        try:
+            url = f"{BASE_URL}/signalk/v1/auth/login"
+            response = http_request('POST', url, LOGIN_BODY, JSON_HEADERS)
+            token = json.loads(response).get('token')
+        except Exception as e:
+            print(f"Auth error: {e}")
+            return None
+
+    if token:
+        expiry = get_token_expiry(token)
+        _auth_token = token
+        _auth_token_expiry = expiry if expiry is not None else float('inf')
+    return token
+
+
+def authorized_request(method, url, token, data=None):
+    """Send an authenticated request, re-authenticating once on 401.
+
+    Args:
+        method: HTTP method ('GET', 'PUT', 'POST')
+        url: Full URL
+        token: Auth token to send
+        data: Optional JSON request body as bytes
+
+    Returns:
+        bytes: Response body
+
+    Raises:
+        Same as http_request()
+    """
+    for attempt in range(2):
+        if method == 'GET':
+            headers = {'Authorization': f'Bearer {token}'}
+        else:
+            headers = {**JSON_HEADERS, 'Authorization': f'Bearer {token}'}
+        try:
+            return http_request(method, url, data, headers)
+        except urllib.error.HTTPError as e:
+            if e.code != 401 or attempt:
+                raise
+            invalidate_auth_token()
+            token = get_auth_token()
+            if not token:
+                raise
 
 
 # =============================================================================
@@ -108,14 +285,42 @@ def get_signalk_value(path, token=None):
 
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/{path}"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except Exception as e:
         return None
 
 
+def get_navigation(token=None):
+    """Get the whole navigation subtree in a single request.
+
+    One fetch covers position, speed, heading and every navigation.anchor
+    path, so callers needing several of them avoid one round trip each.
+    Use nav_value() to read individual leaves.
+
+    Returns:
+        dict: SignalK navigation tree, or None
+    """
+    return get_signalk_value('navigation', token)
+
+
+def nav_value(tree, *path):
+    """Read the 'value' leaf at path from a SignalK subtree.
+
+    Args:
+        tree: Tree returned by get_navigation()
+        *path: Keys below the tree (e.g., 'anchor', 'rodeDeployed')
+
+    Returns:
+        The leaf value, or None if any part of the path is missing
+    """
+    node = tree
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node.get('value') if isinstance(node, dict) else None
+
+
 def get_position(token=None):
     """Get current boat position.
 
@@ -172,12 +377,11 @@ def put_signalk_value(path, value, token=None):
 
     try:
         url = f"{BASE_URL}/signalk/v1/api/vessels/self/{path}"
-        data = json.dumps({"value": value}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return True
+        data = ANCHOR_COMMAND_BODIES.get(value) if isinstance(value, str) else None
+        if data is None:
+            data = json.dumps({"value": value}).encode('utf-8')
+        authorized_request('PUT', url, token, data)
+        return True
     except Exception as e:
         return False
 
@@ -195,6 +399,47 @@ def send_anchor_command(command, token=None):
     return put_signalk_value('navigation/anchor/command', command, token)
 
 
+def stop_chain(token=None):
+    """Stop any running chain operation.
+
+    Args:
+        token: Optional auth token
+
+    Returns:
+        bool: True if the stop command was accepted
+    """
+    return send_anchor_command('stop', token)
+
+
+def reset_anchor(token=None, verify_timeout=10, verbose=False):
+    """Reset anchor rode to 0m and wait for the chain controller to confirm.
+
+    Sends the reset command (PUT navigation.anchor.rodeDeployed = 1), then
+    polls rodeDeployed once a second until it reads below 0.5m.
+
+    Args:
+        token: Optional auth token
+        verify_timeout: Seconds to wait for the rode to reach 0m
+        verbose: Print the rode reading on each poll
+
+    Returns:
+        bool: True if the reset was sent and verified
+    """
+    if token is None:
+        token = get_auth_token()
+    if not put_signalk_value('navigation/anchor/rodeDeployed', 1, token):
+        return False
+
+    for attempt in range(verify_timeout):
+        time.sleep(1)
+        rode = get_rode_deployed(token)
+        if verbose and rode is not None:
+            print(f"   Rode: {rode:.1f}m")
+        if rode is not None and rode < 0.5:
+            return True
+    return False
+
+
 # =============================================================================
 # Simulation Control
 # =============================================================================
@@ -212,10 +457,7 @@ def get_simulation_state(token=None):
 
     try:
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/state"
-        req = urllib.request.Request(url)
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('GET', url, token))
     except:
         return None
 
@@ -238,11 +480,7 @@ def configure_simulation(config, token=None):
     try:
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/config"
         data = json.dumps(config).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return json.loads(response.read())
+        return json.loads(authorized_request('PUT', url, token, data))
     except Exception as e:
         print(f"Config error: {e}")
         return None
@@ -284,11 +522,8 @@ def reset_simulation(token=None):
 
     try:
         url = f"{BASE_URL}/plugins/signalk-anchoralarmconnector/simulation/reset"
-        req = urllib.request.Request(url, method='PUT')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {token}')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            return True
+        authorized_request('PUT', url, token)
+        return True
     except:
         return False
 
@@ -297,12 +532,34 @@ def reset_simulation(token=None):
 # Chain Controller (ESP32)
 # =============================================================================
 
+def esp32_reachable(timeout=0.5):
+    """Check whether the ESP32's HTTP port accepts a TCP connection.
+
+    Args:
+        timeout: Seconds to wait for the connection
+
+    Returns:
+        bool: True if the port accepted the connection
+    """
+    try:
+        socket.create_connection((ESP32_IP, 80), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
 def check_chain_controller():
     """Check if chain controller (ESP32) is responding via SignalK.
 
+    Probes the ESP32 directly first so an unreachable controller is
+    reported without an auth and SignalK round-trip.
+
     Returns:
         tuple: (bool success, str message)
     """
+    if not esp32_reachable():
+        return False, "ESP32 unreachable"
+
     try:
         token = get_auth_token()
         if not token:
@@ -320,11 +577,33 @@ def check_chain_controller():
         return False, str(e)
 
 
-def restart_chain_controller(wait_time=15):
+def backoff_delays(retries, base=0.5, cap=8.0, jitter=0.5):
+    """Yield exponentially growing retry delays with random jitter.
+
+    Args:
+        retries: Number of delays to yield
+        base: First delay in seconds
+        cap: Upper bound on the un-jittered delay
+        jitter: Fraction of each delay added at random (0.5 = up to +50%)
+
+    Yields:
+        float: Seconds to sleep before the next attempt
+    """
+    delay = base
+    for _ in range(retries):
+        yield delay * (1 + random.random() * jitter)
+        delay = min(delay * 2, cap)
+
+
+def restart_chain_controller(wait_time=3, max_retries=6):
     """Restart the ESP32 chain controller.
 
+    Polls for reconnection with exponential backoff after a short initial
+    wait, so a quick boot is noticed early and a slow one still has ~25s.
+
     Args:
-        wait_time: Seconds to wait for restart (default 15)
+        wait_time: Seconds to wait before the first check (default 3)
+        max_retries: Reconnection checks after the first (default 6)
 
     Returns:
         bool: True if successfully restarted and reconnected
@@ -332,20 +611,22 @@ def restart_chain_controller(wait_time=15):
     try:
         print(f"Restarting chain controller at {ESP32_IP}...")
         url = f"http://{ESP32_IP}/api/device/restart"
-        req = urllib.request.Request(url, method='POST')
-        with urllib.request.urlopen(req, timeout=5) as response:
-            pass
+        http_request('POST', url)
 
-        print(f"Waiting {wait_time}s for ESP32 to restart...")
+        print("Waiting for ESP32 to restart...")
         time.sleep(wait_time)
 
-        # Verify reconnection
-        for attempt in range(5):
-            ok, msg = check_chain_controller()
+        # Verify reconnection, backing off between checks
+        ok, msg = check_chain_controller()
+        for delay in backoff_delays(max_retries):
             if ok:
-                print(f"✓ Chain controller reconnected: {msg}")
-                return True
-            time.sleep(3)
+                break
+            time.sleep(delay)
+            ok, msg = check_chain_controller()
+
+        if ok:
+            print(f"✓ Chain controller reconnected: {msg}")
+            return True
 
         print("✗ Chain controller did not reconnect after restart")
         return False
@@ -379,11 +660,12 @@ def verify_server():
         bool: True if server is ready
     """
     try:
-        # Check server responds
-        urllib.request.urlopen(f"{BASE_URL}/signalk", timeout=5).close()
-
-        # Check we can authenticate
-        token = get_auth_token()
+        # Check server responds while authenticating - the two requests are
+        # independent, so overlapping them costs one round-trip instead of two
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            probe = executor.submit(http_request, 'GET', f"{BASE_URL}/signalk")
+            token = get_auth_token()
+            probe.result()
         return token is not None
     except:
         return False
@@ -399,6 +681,54 @@ def verify_simulation():
     return state is not None and state.get('running', False)
 
 
+# =============================================================================
+# Test Data Files
+# =============================================================================
+
+def open_sample_stream(test_file):
+    """Open a test data file and start its 'samples' array for streaming.
+
+    Samples are written as they are collected instead of being held in
+    memory for one large json.dump at the end of a test. The finished file
+    is an ordinary JSON object, so analysis scripts read it with json.load.
+
+    Args:
+        test_file: Path of the .json file to create
+
+    Returns:
+        file: Open handle to pass to write_sample/close_sample_stream
+    """
+    f = open(test_file, 'w')
+    f.write('{\n  "samples": [')
+    return f
+
+
+def write_sample(f, sample, index):
+    """Append one sample to an open 'samples' array.
+
+    Args:
+        f: Handle from open_sample_stream()
+        sample: JSON-serializable sample dict
+        index: Number of samples already written (0 for the first)
+    """
+    f.write((',\n    ' if index else '\n    ') + json.dumps(sample, separators=(',', ':')))
+
+
+def close_sample_stream(f, test_data):
+    """Close the 'samples' array, append the other top-level keys and close the file.
+
+    Args:
+        f: Handle from open_sample_stream()
+        test_data: Dict of top-level keys to write after 'samples'
+    """
+    f.write('\n  ]')
+    for key, value in test_data.items():
+        body = json.dumps(value, indent=2).replace('\n', '\n  ')
+        f.write(f',\n  {json.dumps(key)}: {body}')
+    f.write('\n}\n')
+    f.close()
+
+
 # =============================================================================
 # Coordinate Utilities
 # =============================================================================
@@ -422,7 +752,6 @@ def calculate_bearing(lat1, lon1, lat2, lon2):
     Returns:
         float: Bearing in degrees (0-360)
     """
-    import math
     dlat = (lat2 - lat1) / METERS_TO_LAT
     dlon = (lon2 - lon1) / METERS_TO_LON
     bearing = math.degrees(math.atan2(dlon, dlat))